@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Per-user rate limits and load shedding for the API.
+
+Every request is put in a cost class by path. Requests in the "quiz" class
+(quizzes and answer evaluation) start an LLM call and "execute" requests
+start a ``jac check`` subprocess. Requests in the "walker" class start a
+walker subprocess. "read" requests are served from memory and are never
+limited.
+
+``Admission.admit`` does three checks:
+
+* A token bucket per (user, class). An empty bucket is a 429 with
+  Retry-After set to when the next token arrives. The user is the client
+  address, never a value the client can vary freely such as a username in
+  the path (``RATE_LIMIT_USER_HEADER`` names a header to trust instead, for
+  a proxy that sets it itself or a load test).
+* A cap of ``SHED_USER_IN_FLIGHT`` costed requests in flight per user, also a
+  429, so one client cannot take every slot below the marks.
+* A gauge of costed requests in flight. Quiz and execute calls are shed with
+  a 503 once it reaches ``SHED_HIGH_WATER``, and walker calls once it
+  reaches ``SHED_MAX_IN_FLIGHT``. These are the per-endpoint limits, and they
+  only bite when the server is busy. Both marks sit below the server's worker
+  thread pool (40 threads), so blocked subprocess calls never take the
+  threads that cheap reads need.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SHED_HIGH_WATER = int(os.environ.get("SHED_HIGH_WATER", "16"))
+SHED_MAX_IN_FLIGHT = int(os.environ.get("SHED_MAX_IN_FLIGHT", "32"))
+SHED_USER_IN_FLIGHT = int(os.environ.get("SHED_USER_IN_FLIGHT", "4"))
+# Seconds a shed client is told to wait before retrying.
+SHED_RETRY_AFTER = 2
+# Trusted header naming the user; empty means clients cannot choose their key
+RATE_LIMIT_USER_HEADER = os.environ.get("RATE_LIMIT_USER_HEADER", "").lower()
+
+EXPENSIVE_ROUTES = {"/api/quiz": "quiz", "/api/evaluate": "quiz", "/api/execute": "execute"}
+# Served from the server's memory: the catalog, classroom gate and learner feed
+READ_PREFIXES = ("/api/topics", "/api/chapters/", "/api/chapter-content/", "/api/classrooms", "/api/test", "/api/recommend/", "/api/instructor/")
+
+# class -> (per-user rate/s, burst)
+RATE_LIMITS = {
+    "quiz": (0.2, 3),
+    "execute": (1, 5),
+    "walker": (5, 20),
+}
+
+
+def route_class(path):
+    if path in EXPENSIVE_ROUTES:
+        return EXPENSIVE_ROUTES[path]
+    if not path.startswith("/api/") or path.startswith(READ_PREFIXES):
+        return "read"
+    return "walker"
+
+
+def request_user(client_host, trusted_user=None):
+    """Rate-limit key: the trusted header's user, else the client address."""
+    return trusted_user or client_host or ""
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+
+    def take(self, now):
+        """Take a token; return 0 on success, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Admission:
+    def __init__(self, limits=RATE_LIMITS, high_water=SHED_HIGH_WATER, max_in_flight=SHED_MAX_IN_FLIGHT,
+                 user_in_flight=SHED_USER_IN_FLIGHT, max_users=100_000):
+        self.limits = limits
+        self.high_water = high_water
+        self.max_in_flight = max_in_flight
+        self.user_in_flight = user_in_flight
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        # (user, class) -> TokenBucket, least recently used first
+        self._users = OrderedDict()
+        # user -> costed requests in flight; users with none are not kept
+        self._running = {}
+        self.in_flight = 0
+        self.rejected = {"rate_limited": 0, "shed": 0}
+
+    def admit(self, user, cls):
+        """Return ``(status, retry_after)``: status 200 admits and must be paired with ``release``."""
+        if cls == "read":
+            return 200, 0
+        with self._lock:
+            limit = self.high_water if cls in EXPENSIVE_ROUTES.values() else self.max_in_flight
+            if self.in_flight >= limit:
+                self.rejected["shed"] += 1
+                return 503, SHED_RETRY_AFTER
+            running = self._running.get(user, 0)
+            if running >= self.user_in_flight:
+                self.rejected["rate_limited"] += 1
+                return 429, SHED_RETRY_AFTER
+            wait = self._take(user, cls)
+            if wait:
+                self.rejected["rate_limited"] += 1
+                return 429, wait
+            self._running[user] = running + 1
+            self.in_flight += 1
+            return 200, 0
+
+    def release(self, user, cls):
+        if cls == "read":
+            return
+        with self._lock:
+            self.in_flight -= 1
+            running = self._running.pop(user) - 1
+            if running:
+                self._running[user] = running
+
+    def _take(self, user, cls):
+        per_user = self.limits.get(cls)
+        if not per_user:
+            return 0.0
+        key = (user, cls)
+        bucket = self._users.get(key)
+        if bucket is None:
+            bucket = self._users[key] = TokenBucket(*per_user)
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(key)
+        return bucket.take(time.monotonic())
+
+
+admission = Admission()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Read latency while /api/quiz is flooded, with and without admission control.
+
+    python benchmarks/admission_overload.py [--flood 400] [--quiz-seconds 0.5]
+
+Models the server's 40-thread worker pool: a flood of quiz requests (each
+blocking a thread for ``--quiz-seconds``, like an LLM walker call) arrives
+from many users at once, then reads (1 ms each) arrive behind them. Without
+admission every quiz call queues for a thread and reads wait behind them; with
+it, quiz calls past the high-water mark get 503 and reads keep their threads.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import Admission, RATE_LIMITS
+
+WORKER_THREADS = 40
+
+
+def serve(pool, admission, cls, user, seconds):
+    queued = time.perf_counter()
+
+    def handler():
+        time.sleep(seconds)
+        return time.perf_counter() - queued
+
+    status, _ = admission.admit(user, cls) if admission else (200, 0)
+    if status != 200:
+        return status, time.perf_counter() - queued
+    try:
+        return 200, pool.submit(handler).result()
+    finally:
+        if admission:
+            admission.release(user, cls)
+
+
+def run(admission, args):
+    pool = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+    with ThreadPoolExecutor(max_workers=args.flood + args.reads) as clients:
+        quiz = [clients.submit(serve, pool, admission, "quiz", f"user{i}", args.quiz_seconds) for i in range(args.flood)]
+        time.sleep(0.05)
+        reads = [clients.submit(serve, pool, admission, "read", "reader", 0.001) for _ in range(args.reads)]
+        read_latency = sorted(f.result()[1] * 1000 for f in reads)
+        statuses = [f.result()[0] for f in quiz]
+    pool.shutdown()
+    p50, p99 = read_latency[len(read_latency) // 2], read_latency[int(len(read_latency) * 0.99) - 1]
+    served = statuses.count(200)
+    print(f"{'on' if admission else 'off':<10}{served:>8}{len(statuses) - served:>8}{p50:>12.1f}{p99:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flood", type=int, default=400)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--quiz-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{'admission':<10}{'served':>8}{'shed':>8}{'read p50 ms':>12}{'read p99 ms':>12}")
+    run(None, args)
+    run(Admission(RATE_LIMITS), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Memory per worker process: private catalog copies vs the shared segment.
+
+    python benchmarks/catalog_workers.py [--workers 4] [--topics 100] [--chapters 50] [--body-kb 8]
+
+Builds a synthetic catalog in a temp directory, then starts ``--workers``
+processes per mode. Each one loads the catalog and reads every chapter body,
+and all of them stay alive while their memory is read from
+/proc/self/smaps_rollup (Linux). Modes:
+
+    baseline  interpreter and imports only
+    private   catalog.json parsed and every body kept decoded, as a worker
+              with a warm content cache holds them
+    segment   catalog.Catalog on the mmap'd segment, every body read once
+
+PSS splits shared pages between the processes mapping them, so it is the
+per-worker cost. ``content`` is PSS above the baseline.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from blob_store import BlobStore
+from catalog import Catalog
+
+MODES = ("baseline", "private", "segment")
+
+
+def write_catalog(root, topics, chapters, body_kb):
+    blobs = BlobStore(os.path.join(root, "blobs"))
+    rng = random.Random(0)
+    words = ["walker", "node", "edge", "spawn", "report", "visit", "graph", "root", "ability", "archetype"]
+    compiled = {"topics": [], "aliases": {}}
+    for t in range(topics):
+        metas = []
+        for c in range(chapters):
+            text = f"Chapter {t}.{c}\n" + " ".join(rng.choice(words) for _ in range(body_kb * 150))
+            metas.append({"title": f"Chapter {t}.{c}", "order": c + 1, "hash": blobs.put(text), "size": len(text)})
+        prerequisites = [{"topic": f"Topic {t - 1}", "required_score": 0.7}] if t else []
+        compiled["topics"].append({"name": f"Topic {t}", "description": "", "difficulty": t % 5 + 1,
+                                   "prerequisites": prerequisites, "chapters": metas})
+    path = os.path.join(root, "catalog.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(compiled, f, separators=(",", ":"))
+    return path, blobs.root
+
+
+def memory_kb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Rss"], fields["Pss"]
+
+
+def child(mode, path, blob_root):
+    held = None
+    if mode == "private":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        blobs = BlobStore(blob_root, cache_size=0)
+        held = (data, {ch["hash"]: blobs.get(ch["hash"]) for t in data["topics"] for ch in t["chapters"]})
+    elif mode == "segment":
+        catalog = Catalog(path, BlobStore(blob_root, cache_size=0))
+        for topic in catalog.topics():
+            for ch in catalog.chapters(topic["name"]):
+                catalog.chapter_body(ch["hash"])
+    rss, pss = memory_kb()
+    print(json.dumps({"rss": rss, "pss": pss}), flush=True)
+    sys.stdin.readline()
+    return held
+
+
+def measure(mode, workers, path, blob_root):
+    procs = [
+        subprocess.Popen([sys.executable, __file__, "--child", mode, "--catalog", path, "--blobs", blob_root],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    # Every worker is up and holding its memory before any of them exits
+    samples = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.communicate("\n")
+    return sum(s["rss"] for s in samples) / workers, sum(s["pss"] for s in samples) / workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--chapters", type=int, default=50)
+    parser.add_argument("--body-kb", type=int, default=8)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--catalog", help=argparse.SUPPRESS)
+    parser.add_argument("--blobs", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.catalog, args.blobs)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path, blob_root = write_catalog(tmp, args.topics, args.chapters, args.body_kb)
+        # Publish the segment up front so the workers only map it
+        Catalog(path, BlobStore(blob_root)).version
+        segment_mb = os.path.getsize(os.path.splitext(path)[0] + ".seg") / 2**20
+        print(f"{args.topics * args.chapters:,} chapters, segment {segment_mb:.1f} MiB, {args.workers} workers")
+        print(f"{'mode':<10}{'RSS MiB':>10}{'PSS MiB':>10}{'content MiB':>13}")
+        base = None
+        for mode in MODES:
+            rss, pss = measure(mode, args.workers, path, blob_root)
+            base = pss if base is None else base
+            print(f"{mode:<10}{rss / 1024:>10.1f}{pss / 1024:>10.1f}{(pss - base) / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Size of the initial Chapters page: every body vs. the first metadata page.
+
+    python benchmarks/chapter_payload.py [--chapters 40]
+
+"full" is the old /api/chapters/{topic} body with every chapter's content.
+"listing" is the first page of metadata now returned there, and "opened" is
+the listing plus the one /api/chapter-content body the page opens. Each is
+shown raw and gzip'd. The real topics are followed by a synthetic topic with
+``--chapters`` chapters cycling through the real bodies.
+"""
+import argparse
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import catalog, chapter_body, chapter_catalog, chapter_page
+from json_codec import dumps
+
+
+def sizes(body):
+    raw = dumps(body)
+    return len(raw), len(gzip.compress(raw, compresslevel=9, mtime=0))
+
+
+def compare(name, chapters):
+    full = {"topic": name, "chapters": [
+        {"title": ch["title"], "content": chapter_body(ch["hash"]), "order": ch["order"]} for ch in chapters
+    ]}
+    page, next_cursor = chapter_page(chapters)
+    listing = {"topic": name, "chapters": page, "next_cursor": next_cursor}
+    first = {"hash": page[0]["hash"], "content": chapter_body(page[0]["hash"])}
+    (full_raw, full_gz), (list_raw, list_gz), (body_raw, body_gz) = sizes(full), sizes(listing), sizes(first)
+    print(f"{name:<24}{len(chapters):>5}{full_raw:>9} / {full_gz:<7}{list_raw:>9} / {list_gz:<7}"
+          f"{list_raw + body_raw:>9} / {list_gz + body_gz:<7}{full_raw / (list_raw + body_raw):>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'topic':<24}{'ch':>5}{'full B / gz':>19}{'listing B / gz':>19}{'opened B / gz':>19}{'ratio':>6}")
+    real = []
+    for topic in catalog.topics():
+        chapters = chapter_catalog(topic["name"])
+        real.extend(chapters)
+        compare(topic["name"], chapters)
+    synthetic = [
+        dict(ch, title=f"{ch['title']} ({i})", order=i + 1)
+        for i, ch in enumerate(real[i % len(real)] for i in range(args.chapters))
+    ]
+    compare(f"synthetic x{args.chapters}", synthetic)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Encode time for the chapter and classroom payloads.
+
+    python benchmarks/json_encoding.py [--classrooms 50] [--seats 40] [--requests 2000]
+
+Compares ``json.dumps`` as Starlette's JSONResponse calls it, ``json_codec.dumps``
+(orjson when installed) and a ``response_cache`` hit, for the largest chapter
+listing in the real catalog and a synthetic classroom listing. The walker rows
+compare decoding and re-encoding a walker report with only validating it and
+passing its bytes through (``run_walker(..., raw=True)``).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import catalog, chapter_body, chapter_catalog
+from classroom_roster import ClassroomRegistry
+from json_codec import BACKEND, dumps, loads
+from response_cache import ResponseCache
+
+
+def starlette_dumps(content):
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def chapters_payload():
+    topic = max(catalog.topics(), key=lambda t: sum(ch["size"] for ch in t["chapters"]))["name"]
+    chapters = [
+        {"title": ch["title"], "content": chapter_body(ch["hash"]), "order": ch["order"]}
+        for ch in chapter_catalog(topic)
+    ]
+    return {"topic": topic, "chapters": chapters}
+
+
+def classrooms_payload(classrooms, seats):
+    source = [
+        {
+            "classroom": {"name": f"Room {c}", "instructor": f"teacher{c}", "capacity": seats, "is_live": True,
+                          "meeting_url": f"https://meet.example.com/room-{c}", "chat_enabled": True},
+            "participants": [
+                {"username": f"student{c}-{s}", "role": "student", "is_muted": s % 3 == 0, "camera_on": s % 2 == 0, "hand_raised": s % 7 == 0}
+                for s in range(seats)
+            ],
+        }
+        for c in range(classrooms)
+    ]
+    return {"classrooms": ClassroomRegistry(source=lambda: source).listing()}
+
+
+def per_request_us(fn, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classrooms", type=int, default=50)
+    parser.add_argument("--seats", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    payloads = {"chapters": chapters_payload(), "classrooms": classrooms_payload(args.classrooms, args.seats)}
+    print(f"json_codec backend: {BACKEND}")
+    print(f"{'payload':<12}{'bytes':>10}{'json.dumps':>14}{'json_codec':>14}{'cached':>12}")
+    for name, payload in payloads.items():
+        timings = [
+            per_request_us(lambda: starlette_dumps(payload), args.requests),
+            per_request_us(lambda: dumps(payload), args.requests),
+            per_request_us(lambda: cache.get((name, 1), lambda: dumps(payload)), args.requests),
+        ]
+        print(f"{name:<12}{len(dumps(payload)):>10}" + "".join(f"{us:>11.1f} us" for us in timings[:2]) + f"{timings[2]:>9.1f} us")
+
+    print(f"\n{'walker report':<12}{'bytes':>10}{'json loads+dumps':>20}{'validate only':>16}")
+    for name, payload in payloads.items():
+        stdout = starlette_dumps(payload) + b"\n"
+        timings = [
+            per_request_us(lambda: starlette_dumps(json.loads(stdout)), args.requests),
+            per_request_us(lambda: loads(stdout), args.requests),
+        ]
+        print(f"{name:<12}{len(stdout):>10}{timings[0]:>17.1f} us{timings[1]:>13.1f} us")
+
+
+if __name__ == "__main__":
+    main()
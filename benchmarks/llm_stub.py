@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Local stand-in for the LLM, speaking the OpenAI chat-completions API.
+
+    python benchmarks/llm_stub.py [--port 8099] [--latency 0.8]
+
+Point the walkers at it with ``LLM_MODEL=openai/stub`` and
+``LLM_BASE_URL=http://127.0.0.1:8099/v1``. Every completion waits
+``--latency`` seconds (jittered by +/-25%), then returns a canned quiz or
+evaluation in the JSON shape the walkers ask for.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUIZ = {
+    "question": "Which operator connects two nodes with an edge?",
+    "options": ["++>", "-->", "<--", "::"],
+    "correct": 0,
+    "explanation": "++> creates an edge; --> traverses existing ones.",
+}
+EVALUATION = {"score": 0.8, "feedback": "Mostly right; mention edge direction.", "passed": True}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.8
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        time.sleep(self.latency * random.uniform(0.75, 1.25))
+        content = json.dumps(EVALUATION if "Evaluate" in prompt else QUIZ)
+        reply = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port=8099, latency=0.8):
+    """Start the stub on a background thread and return the server."""
+    handler = type("Handler", (StubHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.8)
+    args = parser.parse_args()
+    serve(args.port, args.latency)
+    print(f"LLM stub on http://127.0.0.1:{args.port}/v1 ({args.latency}s per completion)")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
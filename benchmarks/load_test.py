@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Load generator that replays the frontend's traffic, one thread per user.
+
+    python benchmarks/load_test.py [--users 10,25,50,100] [--duration 60] [--start-server]
+
+Each simulated user follows what App.jsx does after login. It loads
+progress, classrooms and the schedule, then re-polls progress (three
+sequential GETs) every 5 s. Between polls it picks an action and then waits
+a think time: browsing and reading chapters, generating a quiz, validating
+code in the editor, checking classrooms, or completing a chapter. Like a
+browser, it reuses keep-alive connections and revalidates with the ETags
+it has seen.
+
+Users send ``X-Username``. A server started with ``--start-server`` trusts
+it (``RATE_LIMIT_USER_HEADER``), so rate limits apply per simulated user
+rather than to the one load-test address. Each
+stage in ``--users`` runs for ``--duration`` seconds. The report gives
+throughput, p50/p95/p99, error rate and shed rate (429/503) per endpoint,
+plus the first stage whose progress-poll p99 exceeds ``--slo-ms`` or whose
+error rate exceeds 1%.
+
+``--start-server`` starts ``llm_stub.py`` and ``server.py``, with the
+walkers pointed at the stub, so no LLM API key or network is needed.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import llm_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLL_INTERVAL = 5.0
+TOPICS = ("Jac Basics", "Walkers", "OSP Graphs")
+SNIPPET = 'walker greet {\n    can say_hello with entry {\n        print("Hello");\n    }\n}\n'
+# (action, weight, think time range in seconds), as observed from the app
+ACTIONS = (
+    ("chapters", 40, (15, 45)),
+    ("editor", 25, (10, 30)),
+    ("quiz", 15, (20, 40)),
+    ("classrooms", 15, (5, 15)),
+    ("complete", 5, (5, 10)),
+)
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds * 1000)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def rows(self, elapsed):
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            statuses = self.statuses[endpoint]
+            total = len(latencies)
+            errors = sum(n for status, n in statuses.items() if status == 0 or (status >= 500 and status != 503))
+            shed = statuses.get(429, 0) + statuses.get(503, 0)
+            yield endpoint, total, total / elapsed, _pct(latencies, 50), _pct(latencies, 95), _pct(latencies, 99), errors / total, shed / total
+
+
+class User(threading.Thread):
+    def __init__(self, n, base, stats, stop, think_scale):
+        super().__init__(name=f"user-{n}", daemon=True)
+        self.username = f"loadtest{n}"
+        self.base = base
+        self.stats = stats
+        self.stop = stop
+        self.think_scale = think_scale
+        self.conn = None
+        self.etags = {}
+        self.next_poll = 0.0
+        self.rng = random.Random(n)
+
+    def run(self):
+        # Stagger logins over the first poll interval
+        if self.stop.wait(self.rng.uniform(0, POLL_INTERVAL)):
+            return
+        self.load_progress()
+        self.request("GET", "/api/classrooms")
+        self.request("GET", "/api/schedule")
+        self.next_poll = time.monotonic() + POLL_INTERVAL
+        names, weights = zip(*((name, weight) for name, weight, _ in ACTIONS))
+        thinks = {name: think for name, _, think in ACTIONS}
+        while not self.stop.is_set():
+            action = self.rng.choices(names, weights)[0]
+            getattr(self, action)()
+            self.idle(self.rng.uniform(*thinks[action]))
+
+    def idle(self, seconds):
+        """Think for ``seconds`` (scaled), running the 5 s progress poll when it is due."""
+        deadline = time.monotonic() + seconds * self.think_scale
+        while not self.stop.is_set():
+            now = time.monotonic()
+            if now >= self.next_poll:
+                self.load_progress()
+                self.next_poll += POLL_INTERVAL
+                continue
+            if now >= deadline:
+                return
+            self.stop.wait(min(deadline, self.next_poll) - now)
+
+    def load_progress(self):
+        self.request("GET", f"/api/progress/{self.username}", "/api/progress/{username}")
+        self.request("GET", f"/api/recommend/{self.username}", "/api/recommend/{username}")
+        self.request("GET", f"/api/dashboard/{self.username}", "/api/dashboard/{username}")
+
+    def chapters(self):
+        topic = self.rng.choice(TOPICS)
+        listing = self.request("GET", f"/api/chapters/{quote(topic)}", "/api/chapters/{topic_name}") or {}
+        chapters = listing.get("chapters", [])
+        for i, ch in enumerate(chapters[:self.rng.randint(1, 3)]):
+            if i:
+                self.idle(self.rng.uniform(15, 45))
+            self.request("GET", f"/api/chapter-content/{ch['hash']}", "/api/chapter-content/{hash}")
+
+    def editor(self):
+        self.request("POST", "/api/execute", body={"code": SNIPPET})
+
+    def quiz(self):
+        self.request("POST", "/api/quiz", body={"topic_name": self.rng.choice(TOPICS), "difficulty": 2})
+
+    def classrooms(self):
+        self.request("GET", "/api/classrooms")
+        self.request("GET", "/api/schedule")
+
+    def complete(self):
+        self.request("POST", "/api/complete-chapter", body={"username": self.username, "chapter_title": "Hello World"})
+
+    def request(self, method, path, endpoint=None, body=None):
+        endpoint = f"{method} {endpoint or path}"
+        headers = {"X-Username": self.username, "Accept-Encoding": "gzip"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        cached = self.etags.get(path)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        start = time.perf_counter()
+        status, data = 0, None
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.base.hostname, self.base.port or 80, timeout=60)
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            raw = response.read()
+            status = response.status
+            if status == 304 and cached:
+                data = cached[1]
+            elif status == 200:
+                if response.getheader("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                data = json.loads(raw or b"null")
+                if response.getheader("ETag"):
+                    self.etags[path] = (response.getheader("ETag"), data)
+        except (OSError, http.client.HTTPException, ValueError):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+        self.stats.record(endpoint, status, time.perf_counter() - start)
+        return data
+
+
+def _pct(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def run_stage(base, users, duration, think_scale):
+    stats = Stats()
+    stop = threading.Event()
+    threads = [User(n, base, stats, stop, think_scale) for n in range(users)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join(timeout=65)
+    return stats
+
+
+def start_server(url, stub_port, stub_latency):
+    llm_stub.serve(stub_port, stub_latency)
+    env = dict(
+        os.environ,
+        LLM_MODEL="openai/stub",
+        LLM_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+        GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "stub"),
+        RATE_LIMIT_USER_HEADER="X-Username",
+    )
+    server = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=2)
+            conn.request("GET", "/api/test")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise SystemExit("server.py did not come up within 120 s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", default="10,25,50,100", help="comma-separated user counts, one stage each")
+    parser.add_argument("--duration", type=float, default=60, help="seconds per stage")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiply think times (0.1 = 10x busier users)")
+    parser.add_argument("--slo-ms", type=float, default=500, help="p99 bound for the progress poll")
+    parser.add_argument("--start-server", action="store_true", help="start llm_stub.py and server.py first")
+    parser.add_argument("--stub-port", type=int, default=8099)
+    parser.add_argument("--stub-latency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    base = urlsplit(args.url)
+    server = start_server(base, args.stub_port, args.stub_latency) if args.start_server else None
+    saturated = None
+    try:
+        for users in (int(n) for n in args.users.split(",")):
+            stats = run_stage(base, users, args.duration, args.think_scale)
+            rows = list(stats.rows(args.duration))
+            total = sum(r[1] for r in rows)
+            errors = sum(r[1] * r[6] for r in rows) / total if total else 0.0
+            poll_p99 = max((r[5] for r in rows if "/api/progress/" in r[0]), default=0.0)
+            print(f"\n== {users} users, {args.duration:.0f} s: {total / args.duration:.1f} req/s, "
+                  f"progress p99 {poll_p99:.0f} ms, errors {errors:.1%}")
+            print(f"{'endpoint':<38}{'reqs':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'shed':>7}")
+            for endpoint, count, rps, p50, p95, p99, error_rate, shed_rate in rows:
+                print(f"{endpoint:<38}{count:>7}{rps:>8.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{error_rate:>8.1%}{shed_rate:>7.1%}")
+            if saturated is None and (poll_p99 > args.slo_ms or errors > 0.01):
+                saturated = users
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(f"\nSaturated at {saturated} users" if saturated else "\nNo stage breached the SLO")
+
+
+if __name__ == "__main__":
+    main()
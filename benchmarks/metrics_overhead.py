@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Cost of recording a latency observation, and of a /metrics scrape.
+
+    python benchmarks/metrics_overhead.py [--threads 8] [--observations 200000]
+
+Compares ``metrics.Histogram.observe`` (per-thread shards, no lock) with the
+same histogram behind one shared lock, from 1 and ``--threads`` threads, then
+times rendering the registry.
+"""
+import argparse
+import bisect
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import LATENCY_BUCKETS, Histogram, Registry
+
+
+class LockedHistogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = {}
+
+    def observe(self, value, *labels):
+        with self.lock:
+            row = self.rows.setdefault(labels, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0])
+            row[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+            row[-2] += value
+            row[-1] += 1
+
+
+def per_observation_ns(observe, threads, observations):
+    def work():
+        for i in range(observations // threads):
+            observe(0.004, "/api/topics", "GET")
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return (time.perf_counter() - start) / observations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--observations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    sharded = Histogram(registry, "request_seconds", "", ("route", "method"))
+    locked = LockedHistogram()
+    print(f"{'threads':<10}{'sharded ns':>12}{'locked ns':>12}")
+    for threads in (1, args.threads):
+        print(f"{threads:<10}{per_observation_ns(sharded.observe, threads, args.observations):>12.0f}"
+              f"{per_observation_ns(locked.observe, threads, args.observations):>12.0f}")
+
+    for i in range(40):
+        sharded.observe(0.01, f"/api/route{i}", "GET")
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"scrape: {(time.perf_counter() - start) * 1000:.2f} ms for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Memory used by 1M participants in each storage layout.
+
+    python benchmarks/participant_memory.py [--count 1000000]
+
+"objects" mirrors a participant node and classroom_session edge as plain
+Python objects with a ``__dict__`` (a lower bound for the Jac archetypes, which
+also carry anchors). "slots" is the same pair with ``__slots__``. "compact" is
+what ``PARTICIPANT_STORAGE=compact`` keeps in the graph: ``session_page``
+nodes, stood in for by a two-slot object, each holding one encoded page of
+``SESSION_PAGE_ROWS`` rows. The last line times one join into a full page,
+the decode, change and encode a walker does per seat.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from participant_store import SESSION_PAGE_ROWS, SessionRows, save, seat
+
+ROLES = ("student", "student", "student", "instructor", "moderator")
+
+
+class Participant:
+    def __init__(self, username, role, is_muted, camera_on, hand_raised, join_time):
+        self.username = username
+        self.role = role
+        self.is_muted = is_muted
+        self.camera_on = camera_on
+        self.hand_raised = hand_raised
+        self.join_time = join_time
+
+
+class ClassroomSession:
+    def __init__(self, source, target, joined_at, participation_score):
+        self.source = source
+        self.target = target
+        self.joined_at = joined_at
+        self.participation_score = participation_score
+
+
+class SlotParticipant:
+    __slots__ = ("username", "role", "is_muted", "camera_on", "hand_raised", "join_time")
+
+    def __init__(self, username, role, is_muted, camera_on, hand_raised, join_time):
+        self.username = username
+        self.role = role
+        self.is_muted = is_muted
+        self.camera_on = camera_on
+        self.hand_raised = hand_raised
+        self.join_time = join_time
+
+
+class SlotClassroomSession:
+    __slots__ = ("source", "target", "joined_at", "participation_score")
+
+    def __init__(self, source, target, joined_at, participation_score):
+        self.source = source
+        self.target = target
+        self.joined_at = joined_at
+        self.participation_score = participation_score
+
+
+class Page:
+    __slots__ = ("count", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.rows = b""
+
+
+def rows(count):
+    for i in range(count):
+        # Strings are built per row, as they would be when parsed from requests.
+        yield (
+            f"user{i}", f"Classroom {i % 500}", ROLES[i % len(ROLES)], i % 3 == 0, i % 2 == 0,
+            i % 7 == 0, f"{9 + i % 8:02d}:{i % 60:02d} AM", f"2024-01-15 {9 + i % 8:02d}:{i % 60:02d}",
+        )
+
+
+def build_objects(count, participant_cls, session_cls):
+    sessions = []
+    for username, classroom, role, muted, camera, hand, join_time, joined_at in rows(count):
+        p = participant_cls(username, role, muted, camera, hand, join_time)
+        sessions.append(session_cls(p, classroom, joined_at, 0.0))
+    return sessions
+
+
+def build_compact(count):
+    pages = []
+    page, current = Page(), SessionRows()
+    for username, _, role, muted, camera, hand, join_time, joined_at in rows(count):
+        current.seat(username, role, joined_at, muted, camera, hand, join_time)
+        if len(current) == SESSION_PAGE_ROWS:
+            save(page, current)
+            pages.append(page)
+            page, current = Page(), SessionRows()
+    if len(current):
+        save(page, current)
+        pages.append(page)
+    return pages
+
+
+def measure(name, build, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build(count)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} {current / 2**20:>10.1f} MiB {current / count:>10.1f} B/participant {elapsed:>8.2f} s")
+    return built
+
+
+def time_join(pages, repeat=200):
+    page = pages[0]
+    full = page.rows
+    start = time.perf_counter()
+    for i in range(repeat):
+        page.rows = full
+        seat(page, f"late{i}", "student", "2024-01-15T10:00:00")
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"join into a {SESSION_PAGE_ROWS}-row page: {elapsed * 1e6:.0f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.count:,} participants")
+    # Each layout is released before the next is measured
+    measure("objects", lambda n: build_objects(n, Participant, ClassroomSession), args.count)
+    measure("slots", lambda n: build_objects(n, SlotParticipant, SlotClassroomSession), args.count)
+    pages = measure("compact", build_compact, args.count)
+    time_join(pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Bytes on the wire and CPU per request for /api/chapters.
+
+    python benchmarks/response_encoding.py [--requests 2000]
+
+Uses the real catalog and chapter blobs. For every topic it times:
+serializing the body on each request (what the endpoint did before),
+serializing plus gzip on each request (what compression middleware would
+cost), and a response_cache hit plus Accept-Encoding negotiation.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import catalog, chapter_body, chapter_catalog
+from response_cache import ResponseCache, negotiate
+
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+def chapters_body(topic_name):
+    chapters = [
+        {"title": ch["title"], "content": chapter_body(ch["hash"]), "order": ch["order"]}
+        for ch in chapter_catalog(topic_name)
+    ]
+    return {"topic": topic_name, "chapters": chapters}
+
+
+def per_request_us(fn, requests):
+    start = time.process_time()
+    for _ in range(requests):
+        body = fn()
+    return (time.process_time() - start) / requests * 1e6, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    version = catalog.version
+    print(f"{'topic':<28}{'json.dumps':>20}{'dumps + gzip':>20}{'cached':>20}")
+    for topic in catalog.topics():
+        name = topic["name"]
+        build = lambda: json.dumps(chapters_body(name), separators=(",", ":")).encode("utf-8")
+
+        def cached():
+            body = cache.get(("chapters", version, name), build)
+            return body.variants[negotiate(ACCEPT_ENCODING, tuple(body.variants))]
+
+        plain = per_request_us(lambda: json.dumps(chapters_body(name)).encode("utf-8"), args.requests)
+        gzipped = per_request_us(lambda: gzip.compress(build(), compresslevel=6), args.requests)
+        hit = per_request_us(cached, args.requests)
+        print(f"{name:<28}" + "".join(f"{us:>9.1f} us {size:>6} B" for us, size in (plain, gzipped, hit)))
+    print(f"cache: {cache.hits} hits, {cache.misses} misses, {cache.nbytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
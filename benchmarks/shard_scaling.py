@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Per-user request throughput as the number of shards grows.
+
+    python benchmarks/shard_scaling.py [--requests 200] [--work 2000000] [--shards 1,2,4,8]
+
+Each request is a subprocess that burns ``--work`` loop iterations of CPU, a
+stand-in for a grading or progress walker, routed through ``ShardRouter`` by
+username from 64 concurrent clients. Speedup is relative to one shard.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shard_router import ShardRouter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--work", type=int, default=2_000_000)
+    parser.add_argument("--shards", default="1,2,4,8")
+    args = parser.parse_args()
+
+    script = f"import json; sum(range({args.work})); print(json.dumps({{}}))"
+
+    def command(walker, walker_args, shard):
+        return [sys.executable, "-c", script]
+
+    print(f"{os.cpu_count()} cores, {args.requests} requests")
+    print(f"{'shards':>8} {'req/s':>10} {'speedup':>8}")
+    baseline = None
+    for shards in (int(n) for n in args.shards.split(",")):
+        router = ShardRouter(shards=shards, command=command)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=64) as clients:
+            list(clients.map(lambda i: router.run("get_learner_progress", username=f"user{i}"), range(args.requests)))
+        rate = args.requests / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{shards:>8} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
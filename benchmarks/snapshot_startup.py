@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Time to first request from a graph snapshot, by catalog size.
+
+    python benchmarks/snapshot_startup.py [--sizes 1000,10000,100000]
+
+Each size is a synthetic graph with that many chapters (spread over topics of
+50), one learner per chapter with a mastery edge, and a few classrooms.
+"first request" opens the snapshot and answers what server.py needs first: the
+classroom listing and one topic's chapters. "full decode" reads every node and
+edge, the lower bound for rebuilding the graph eagerly.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_snapshot import Snapshot, SnapshotWriter, classrooms
+
+CHAPTERS_PER_TOPIC = 50
+CLASSROOMS = 10
+
+
+def build(chapters):
+    writer = SnapshotWriter()
+    root = writer.add_node("root", {})
+    topics = []
+    for t in range(max(chapters // CHAPTERS_PER_TOPIC, 1)):
+        topic = writer.add_node("topic", {"name": f"Topic {t}", "description": "", "difficulty": t % 5 + 1})
+        writer.add_edge("GenericEdge", root, topic, {})
+        topics.append(topic)
+    for c in range(chapters):
+        chapter = writer.add_node("chapter", {"title": f"Chapter {c}", "order": c % CHAPTERS_PER_TOPIC + 1, "content_hash": f"{c:064x}", "size": 2048})
+        writer.add_edge("GenericEdge", topics[c // CHAPTERS_PER_TOPIC % len(topics)], chapter, {})
+        user = writer.add_node("learner", {"username": f"user{c}", "current_topic": "none", "study_streak": 0, "total_time": 0})
+        writer.add_edge("GenericEdge", root, user, {})
+        writer.add_edge("mastery", user, topics[c % len(topics)], {"score": 0.5})
+    for r in range(CLASSROOMS):
+        room = writer.add_node("virtual_classroom", {"name": f"Room {r}", "instructor": "", "capacity": 30, "meeting_url": ""})
+        writer.add_edge("GenericEdge", root, room, {})
+        for s in range(20):
+            p = writer.add_node("participant", {"username": f"p{r}-{s}", "role": "student", "join_time": "09:00 AM"})
+            writer.add_edge("GenericEdge", root, p, {})
+            writer.add_edge("classroom_session", p, room, {"joined_at": "2024-01-15 09:00", "participation_score": 0.0})
+    return writer
+
+
+def first_request(path):
+    snapshot = Snapshot(path)
+    classrooms(snapshot)
+    topic = snapshot.nodes_of_type("topic")[0]
+    [snapshot.node(target) for _, target, _ in snapshot.edges(topic)]
+    return snapshot
+
+
+def full_decode(path):
+    snapshot = Snapshot(path)
+    for i in range(snapshot.node_count):
+        snapshot.node(i)
+        snapshot.edges(i)
+    return snapshot
+
+
+def timed(fn, path, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path).close()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    print(f"{'chapters':>10} {'file':>10} {'write':>10} {'open':>10} {'first req':>10} {'full decode':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            path = os.path.join(tmp, f"{size}.snap")
+            start = time.perf_counter()
+            build(size).write(path)
+            written = (time.perf_counter() - start) * 1000
+            print(
+                f"{size:>10,} {os.path.getsize(path) / 2**20:>8.1f}MB {written:>8.0f}ms "
+                f"{timed(Snapshot, path):>8.2f}ms {timed(first_request, path):>8.2f}ms "
+                f"{timed(full_decode, path, repeat=1):>10.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Mutation log throughput and ack latency under concurrent writers.
+
+    python benchmarks/wal_throughput.py [--writers 64] [--seconds 3] [--windows 0,1,2,5]
+
+Each writer thread appends a mastery mutation and waits for the
+acknowledgement before sending the next one. All of them share one process,
+as the appends of a bulk walker do. Window 0 still groups whatever arrived
+during the previous fsync. The "fsync each" row is one writer. That is what
+the server sees, because every request's walker is a separate process that
+appends once.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_log import MutationLog
+
+
+def run(directory, window_ms, writers, seconds):
+    wal = MutationLog(directory, group_commit_ms=window_ms)
+    latencies = [[] for _ in range(writers)]
+    stop = time.monotonic() + seconds
+
+    def writer(n):
+        i = 0
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            wal.append("mastery", f"user{n}", "Walkers", (i % 100) / 100.0)
+            latencies[n].append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    wal.close()
+
+    samples = sorted(x for lane in latencies for x in lane)
+    replayed = sum(1 for _ in MutationLog(directory).replay())
+    assert replayed == len(samples), (replayed, len(samples))
+    return {
+        "rate": len(samples) / elapsed,
+        "fsyncs": wal.groups,
+        "p50": statistics.median(samples) * 1000,
+        "p99": samples[int(len(samples) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--windows", default="0,1,2,5")
+    args = parser.parse_args()
+
+    print(f"{'window':>10} {'writers':>8} {'mutations/s':>12} {'fsyncs':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    cases = [("fsync each", 0.0, 1)] + [(f"{w} ms", float(w), args.writers) for w in args.windows.split(",")]
+    for label, window, writers in cases:
+        with tempfile.TemporaryDirectory() as tmp:
+            r = run(tmp, window, writers, args.seconds)
+        print(f"{label:>10} {writers:>8} {r['rate']:>12,.0f} {r['fsyncs']:>8,} {r['p50']:>8.2f} {r['p99']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
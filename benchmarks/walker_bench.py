@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Per-walker timings on a synthetic graph, compared against a stored baseline.
+
+    python benchmarks/walker_bench.py [--learners 1000] [--topics 20] [--chapters 10]
+        [--classrooms 10] [--participants 200] [--density 0.5] [--repeat 7]
+        [--output results.json] [--save-baseline] [--threshold 0.15]
+
+The script seeds a fresh session with the ``seed_synthetic`` walker, then
+runs each benchmarked walker ``--repeat`` times through ``jac run``, which
+is how the server calls them. ``hello`` (no graph access) is timed the same
+way. Its median is the process and compile floor, and ``net`` is a walker's
+median minus that floor. evaluate_answer talks to ``llm_stub.py`` with no
+added latency, so it measures graph and WAL work and no LLM time.
+
+Results are printed as a table and can be written as JSON with ``--output``.
+``--save-baseline`` stores them in ``benchmarks/walker_baseline.json``.
+Otherwise they are compared with that file when it exists and was recorded
+at the same scale. A walker whose net time grew by more than
+``--threshold`` (and by at least ``--min-delta-ms``) is flagged, and the
+script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import llm_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "walker_baseline.json")
+SCALE = ("learners", "topics", "chapters", "classrooms", "participants", "density")
+
+
+def cases(scale, i):
+    """Walker name -> args for repetition ``i``; lookups rotate over the synthetic ids."""
+    learner = f"learner{(i * 7919) % max(scale['learners'], 1)}"
+    topic = f"Topic {i % max(scale['topics'], 1)}"
+    return {
+        "get_topics": {},
+        "get_learner_progress": {"username": learner},
+        "get_chapters": {"topic_name": topic},
+        "get_virtual_classrooms": {},
+        "join_virtual_classroom": {"username": f"bench{i}", "classroom_name": f"Room {i % max(scale['classrooms'], 1)}"},
+        "evaluate_answer": {"username": learner, "topic_name": topic, "user_answer": "Walkers traverse nodes along edges."},
+    }
+
+
+def run_walker(walker, args, session, env, timeout):
+    cmd = ["jac", "run", "main.jac", "-w", walker, "--session", session]
+    for key, value in args.items():
+        cmd += ["--args", f"{key}={value}"]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=timeout)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"{walker} failed ({result.returncode}):\n{result.stderr[-2000:]}")
+    return elapsed
+
+
+def summarize(samples, floor):
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "median_ms": round(median, 2),
+        "min_ms": round(ordered[0], 2),
+        "p90_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 2),
+        "net_ms": round(max(median - floor, 0.0), 2),
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Walker name -> (baseline net, current net, change) for each regression."""
+    regressions = {}
+    for walker, current in results["walkers"].items():
+        before = baseline["walkers"].get(walker)
+        if before is None:
+            continue
+        delta = current["net_ms"] - before["net_ms"]
+        if delta > min_delta and delta > before["net_ms"] * threshold:
+            regressions[walker] = (before["net_ms"], current["net_ms"], delta / before["net_ms"] if before["net_ms"] else float("inf"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--learners", type=int, default=1000)
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--chapters", type=int, default=10, help="chapters per topic")
+    parser.add_argument("--classrooms", type=int, default=10)
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.5, help="fraction of topics each learner has mastery on")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative net-time growth flagged as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore changes smaller than this")
+    args = parser.parse_args()
+
+    scale = {name: getattr(args, name) for name in SCALE}
+    stub = llm_stub.serve(port=0, latency=0.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            WAL_DIR=os.path.join(tmp, "wal"),
+            GRAPH_SNAPSHOT=os.path.join(tmp, "graph.snap"),
+            LLM_MODEL="openai/stub",
+            LLM_BASE_URL=f"http://127.0.0.1:{stub.server_address[1]}/v1",
+            GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "stub"),
+        )
+        session = os.path.join(tmp, "graph.session")
+        seed_ms = run_walker("seed_synthetic", scale, session, env, args.timeout)
+
+        floor_samples = [run_walker("hello", {}, session, env, args.timeout) for _ in range(args.repeat)]
+        floor = statistics.median(floor_samples)
+        samples = {}
+        for i in range(args.repeat):
+            for walker, walker_args in cases(scale, i).items():
+                samples.setdefault(walker, []).append(run_walker(walker, walker_args, session, env, args.timeout))
+    stub.shutdown()
+
+    results = {
+        "scale": scale,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed_ms": round(seed_ms, 1),
+        "floor_ms": round(floor, 2),
+        "walkers": {walker: summarize(times, floor) for walker, times in samples.items()},
+    }
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != scale:
+            print(f"Baseline was recorded at {baseline.get('scale')}; not comparing")
+            baseline = None
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms) if baseline else {}
+
+    print(f"seed {results['seed_ms']:.0f} ms, process floor (hello) {results['floor_ms']:.1f} ms")
+    print(f"{'walker':<26}{'median ms':>11}{'p90 ms':>9}{'net ms':>9}{'baseline':>10}")
+    for walker, row in results["walkers"].items():
+        before = baseline["walkers"].get(walker, {}).get("net_ms") if baseline else None
+        flag = "  REGRESSION" if walker in regressions else ""
+        before_text = f"{before:>10.1f}" if before is not None else f"{'-':>10}"
+        print(f"{walker:<26}{row['median_ms']:>11.1f}{row['p90_ms']:>9.1f}{row['net_ms']:>9.1f}{before_text}{flag}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(results, regressions=sorted(regressions)), f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        for walker, (before, after, change) in regressions.items():
+            print(f"{walker}: net {before:.1f} -> {after:.1f} ms (+{change:.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
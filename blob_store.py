@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Content-addressed, compressed storage for chapter bodies.
+
+Bodies are keyed by the SHA-256 of their UTF-8 text and written once as zlib
+files under ``content/blobs/<hash[:2]>/<hash[2:]>``, so identical chapters are
+stored once. Chapter nodes keep only the hash; a body is read and decompressed
+when a chapter is opened and a small LRU keeps the hot ones in memory.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+BLOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "blobs")
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root=BLOB_DIR, cache_size=64):
+        self.root = root
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def has(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, text):
+        """Store ``text`` if it is new and return its hash."""
+        digest = content_hash(text)
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(text.encode("utf-8"), 9))
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest):
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+        try:
+            with open(self.path(digest), "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        with self._lock:
+            self._cache[digest] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def compressed_size(self, digest):
+        return os.path.getsize(self.path(digest))
+
+
+blob_store = BlobStore()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Topic and chapter catalog backed by content/catalog.json.
+
+The catalog file carries metadata only (title, order, size and the blob hash of
+each chapter); bodies stay in ``blob_store``. Reads are served from a
+``catalog_segment`` built from both and mapped read-only, so every server
+process shares one copy of the content. Legacy topic names are kept as aliases
+of the topic whose chapters they reuse.
+"""
+import base64
+import bisect
+import hashlib
+import json
+import os
+import threading
+
+from blob_store import blob_store
+from catalog_segment import open_segment, write_segment
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "catalog.json")
+CATALOG_SEGMENT = os.environ.get("CATALOG_SEGMENT", os.path.splitext(CATALOG_PATH)[0] + ".seg")
+CHAPTER_PAGE_SIZE = 25
+MAX_CHAPTER_PAGE_SIZE = 100
+
+
+class Catalog:
+    def __init__(self, path=CATALOG_PATH, blobs=blob_store, segment_path=None):
+        self.path = path
+        self.blobs = blobs
+        self.segment_path = segment_path or (CATALOG_SEGMENT if path == CATALOG_PATH else os.path.splitext(path)[0] + ".seg")
+        self._lock = threading.Lock()
+        self._segment = None
+        self._version = None
+        self._stat = None
+
+    def reload(self):
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+        segment = open_segment(self.segment_path)
+        if segment is None or segment.version != version:
+            # First process to see this version publishes it; the rename makes the swap atomic
+            write_segment(json.loads(raw), version, self.blobs, self.segment_path)
+            segment = open_segment(self.segment_path)
+        with self._lock:
+            # The old mapping is left to the collector so in-flight reads finish on it
+            self._segment = segment
+            self._version = version
+            self._stat = (stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def version(self):
+        """Hash of the catalog file; changes whenever a topic or chapter does.
+
+        The file is re-read if it changed on disk, e.g. after a re-seed in
+        another process.
+        """
+        stat = os.stat(self.path)
+        if self._segment is None or self._stat != (stat.st_mtime_ns, stat.st_size):
+            self.reload()
+        return self._version
+
+    def topics(self):
+        return self._data().topics()
+
+    def resolve(self, topic_name):
+        return self._data().aliases.get(topic_name, topic_name)
+
+    def chapters(self, topic_name):
+        """Chapter metadata for a topic (or alias), without bodies."""
+        segment = self._data()
+        topic = segment.topic(segment.aliases.get(topic_name, topic_name))
+        return topic["chapters"] if topic else []
+
+    def chapter_body(self, digest):
+        try:
+            return self._data().body(digest)
+        except KeyError:
+            # Bodies not in the published catalog (e.g. seeded directly) stay in the blob store
+            return self.blobs.get(digest)
+
+    def _data(self):
+        segment = self._segment
+        if segment is None:
+            self.reload()
+            segment = self._segment
+        return segment
+
+
+catalog = Catalog()
+
+
+def chapter_catalog(topic_name):
+    return catalog.chapters(topic_name)
+
+
+def chapter_body(digest):
+    return catalog.chapter_body(digest)
+
+
+def encode_cursor(chapter):
+    """Opaque cursor pointing just past ``chapter`` in (order, title) order."""
+    raw = json.dumps([chapter["order"], chapter["title"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(order, title) from ``encode_cursor``; raises ValueError if malformed."""
+    try:
+        order, title = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        order, title = None, None
+    if not isinstance(order, int) or not isinstance(title, str):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return order, title
+
+
+def chapter_page(chapters, cursor=None, limit=CHAPTER_PAGE_SIZE):
+    """One page of ``chapters`` (sorted by order, title) and the cursor of the next.
+
+    The cursor holds the last chapter's sort key rather than an offset, so a
+    chapter inserted before it does not shift later pages.
+    """
+    limit = min(max(limit, 1), MAX_CHAPTER_PAGE_SIZE)
+    start = 0
+    if cursor:
+        start = bisect.bisect_right(chapters, decode_cursor(cursor), key=lambda ch: (ch["order"], ch["title"]))
+    page = chapters[start:start + limit]
+    next_cursor = encode_cursor(page[-1]) if start + limit < len(chapters) else None
+    return page, next_cursor
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Read-only catalog segment shared by every server process through mmap.
+
+Layout (little endian):
+
+    header   magic, format version, catalog version, topic/body counts, section offsets
+    names    marshal'd (topic names in catalog order, aliases)
+    topics   topic_count x (data offset, data length)
+    bodies   body_count x (sha256 digest, data offset, data length), sorted by digest
+    data     marshal'd topic dicts (with chapter metadata), then UTF-8 chapter bodies
+
+The segment is written next to ``catalog.json`` whenever the catalog
+changes, to a temp file renamed over the old one. Each process maps it
+read-only, so the bodies and metadata sit in the page cache once for the
+server and all the walker processes it starts. A process that still holds the old mapping
+keeps a consistent view until it remaps on the next catalog version. Bodies
+are found by binary search over the digest table, so opening a segment does
+not build any per-chapter structures.
+"""
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"ILPCSEG1"
+VERSION = 1
+HEADER = struct.Struct("<8sHxxxxxx16sQQQQQQ")
+TOPIC = struct.Struct("<QQ")
+BODY = struct.Struct("<32sQQ")
+
+
+def write_segment(compiled, version, blobs, path):
+    """Pack a compiled catalog and its chapter bodies into ``path`` atomically."""
+    topics = [marshal.dumps(topic) for topic in compiled["topics"]]
+    names = marshal.dumps(([t["name"] for t in compiled["topics"]], compiled.get("aliases", {})))
+    digests = sorted({ch["hash"] for t in compiled["topics"] for ch in t["chapters"]})
+    bodies = [blobs.get(digest).encode("utf-8") for digest in digests]
+
+    names_at = HEADER.size
+    topics_at = names_at + len(names)
+    bodies_at = topics_at + TOPIC.size * len(topics)
+    data_at = bodies_at + BODY.size * len(bodies)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".catalog-seg-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, version.encode("ascii"), len(topics), len(bodies), names_at, topics_at, bodies_at, data_at))
+            f.write(names)
+            offset = data_at
+            for data in topics:
+                f.write(TOPIC.pack(offset, len(data)))
+                offset += len(data)
+            for digest, data in zip(digests, bodies):
+                f.write(BODY.pack(bytes.fromhex(digest), offset, len(data)))
+                offset += len(data)
+            for data in topics:
+                f.write(data)
+            for data in bodies:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+class CatalogSegment:
+    """Read-only, memory-mapped view of a catalog segment."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, catalog_version, self.topic_count, self.body_count, names_at, self._topics_at, self._bodies_at, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} catalog segment")
+        self.version = catalog_version.decode("ascii")
+        names, self.aliases = marshal.loads(self._map[names_at:self._topics_at])
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def topic(self, name):
+        """Topic dict (chapter metadata included) decoded from the map, or None."""
+        i = self._index.get(name)
+        if i is None:
+            return None
+        offset, length = TOPIC.unpack_from(self._map, self._topics_at + i * TOPIC.size)
+        return marshal.loads(self._map[offset:offset + length])
+
+    def topics(self):
+        return [self.topic(name) for name in self._index]
+
+    def body(self, digest):
+        """Chapter body by hex SHA-256; raises KeyError if the segment lacks it."""
+        try:
+            key = bytes.fromhex(digest)
+        except ValueError:
+            raise KeyError(digest) from None
+        lo, hi = 0, self.body_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = self._bodies_at + mid * BODY.size
+            probe = self._map[at:at + 32]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                _, offset, length = BODY.unpack_from(self._map, at)
+                return str(self._map[offset:offset + length], "utf-8")
+        raise KeyError(digest)
+
+
+def open_segment(path):
+    """The segment at ``path``, or None if it is missing or not a segment."""
+    try:
+        return CatalogSegment(path)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
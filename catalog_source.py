@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Declarative catalog source and diff-based seeding.
+
+The catalog is authored as one directory per topic under ``content/topics``:
+
+    content/topics/<topic>/topic.json          name, description, difficulty,
+                                               prerequisites, aliases
+    content/topics/<topic>/chapters/*.json     title, order, content
+
+``build`` compiles the source into ``content/catalog.json`` and the blob store.
+It keeps a stat cache so only files that changed since the last build are
+read and hashed. ``plan`` diffs the compiled catalog against the live graph by
+content hash and returns only the inserts, updates and deletes;
+the ``seed_catalog`` walker applies them. Topic and chapter nodes are matched
+by name and title and updated in place, so learner edges are left alone.
+
+Chapters are reordered in the source too (``reorder``), so the next build
+republishes the catalog with the new order and seeding carries it to the graph.
+
+Usage:
+    python catalog_source.py            # build content/catalog.json
+    python catalog_source.py --seed     # build, then apply the diff to the graph
+    python catalog_source.py --reorder TOPIC TITLE ORDER --seed
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from blob_store import blob_store
+from catalog import CATALOG_PATH, catalog
+from shard_router import ShardRouter
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "topics")
+BUILD_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", ".build-cache.json")
+
+
+def _write_json(path, data):
+    # dumps without indent takes the C encoder; catalog.json is a build output
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, separators=(",", ":")))
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _load_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def reorder(topic_name, chapter_title, order, source_dir=SOURCE_DIR):
+    """Set a chapter's order in its source file; returns the file's path.
+
+    Raises KeyError if the topic (by name or alias) or the chapter is not in
+    the source.
+    """
+    for entry in os.scandir(source_dir):
+        topic = _load_json(os.path.join(entry.path, "topic.json"), None) if entry.is_dir() else None
+        if topic is None or topic_name not in (topic["name"], *topic.get("aliases", [])):
+            continue
+        chapter_dir = os.path.join(entry.path, "chapters")
+        for chapter_file in (os.scandir(chapter_dir) if os.path.isdir(chapter_dir) else []):
+            chapter = _load_json(chapter_file.path, None) if chapter_file.name.endswith(".json") else None
+            if chapter is not None and chapter["title"] == chapter_title:
+                chapter["order"] = order
+                # Source files are hand-edited, so they keep their indented layout
+                fd, tmp = tempfile.mkstemp(dir=chapter_dir)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(chapter, indent=2, ensure_ascii=False))
+                    f.write("\n")
+                os.replace(tmp, chapter_file.path)
+                return chapter_file.path
+        raise KeyError(chapter_title)
+    raise KeyError(topic_name)
+
+
+def build(source_dir=SOURCE_DIR, catalog_path=CATALOG_PATH, cache_path=BUILD_CACHE, blobs=blob_store):
+    """Compile the source tree into the catalog file; return the catalog dict."""
+    cache = _load_json(cache_path, {})
+    fresh_cache = {}
+    changed = False
+
+    def read(path, stat, key, parse):
+        # Files whose mtime and size match the cache are not opened again
+        nonlocal changed
+        cached = cache.get(key)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["bytes"] == stat.st_size:
+            value = cached["value"]
+        else:
+            value = parse(_load_json(path, None))
+            changed = True
+        fresh_cache[key] = {"mtime_ns": stat.st_mtime_ns, "bytes": stat.st_size, "value": value}
+        return value
+
+    def chapter_meta(chapter):
+        content = chapter["content"]
+        return {"title": chapter["title"], "order": chapter["order"], "hash": blobs.put(content), "size": len(content)}
+
+    topics = []
+    aliases = {}
+    for entry in os.scandir(source_dir):
+        topic_file = os.path.join(entry.path, "topic.json")
+        if not entry.is_dir() or not os.path.exists(topic_file):
+            continue
+        topic = read(topic_file, os.stat(topic_file), f"{entry.name}/topic.json", lambda t: t)
+        chapter_dir = os.path.join(entry.path, "chapters")
+        chapters = [
+            read(chapter_file.path, chapter_file.stat(), f"{entry.name}/{chapter_file.name}", chapter_meta)
+            for chapter_file in (os.scandir(chapter_dir) if os.path.isdir(chapter_dir) else [])
+            if chapter_file.name.endswith(".json")
+        ]
+        chapters.sort(key=lambda ch: (ch["order"], ch["title"]))
+        topics.append({
+            "name": topic["name"],
+            "description": topic.get("description", ""),
+            "difficulty": topic.get("difficulty", 1),
+            "prerequisites": topic.get("prerequisites", []),
+            "chapters": chapters,
+        })
+        for alias in topic.get("aliases", []):
+            aliases[alias] = topic["name"]
+
+    topics.sort(key=lambda t: (t["difficulty"], t["name"]))
+    compiled = {"topics": topics, "aliases": aliases}
+    changed = changed or fresh_cache.keys() != cache.keys()
+    if changed or not os.path.exists(catalog_path):
+        _write_json(catalog_path, compiled)
+        if catalog_path == catalog.path:
+            catalog.reload()
+        _write_json(cache_path, fresh_cache)
+    return compiled
+
+
+def plan(live, compiled=None):
+    """Diff the compiled catalog against the live graph.
+
+    ``live`` is ``{"topics": {name: [description, difficulty]},
+    "chapters": {topic: {title: [order, hash, size]}},
+    "prerequisites": {topic: {prereq: required_score}}}`` as read from the graph.
+    Returns lists of changes to apply, keyed by kind.
+    """
+    compiled = compiled or _load_json(CATALOG_PATH, {"topics": []})
+    changes = {
+        "insert_topics": [], "update_topics": [], "delete_topics": [],
+        "insert_chapters": [], "update_chapters": [], "delete_chapters": [],
+        "set_prerequisites": [], "delete_prerequisites": [],
+    }
+    wanted = {t["name"]: t for t in compiled["topics"]}
+    for name, topic in wanted.items():
+        fields = [topic["description"], topic["difficulty"]]
+        current = live["topics"].get(name)
+        if current is None:
+            changes["insert_topics"].append([name] + fields)
+        elif list(current) != fields:
+            changes["update_topics"].append([name] + fields)
+
+        live_chapters = live["chapters"].get(name, {})
+        titles = set()
+        for ch in topic["chapters"]:
+            titles.add(ch["title"])
+            row = [name, ch["title"], ch["order"], ch["hash"], ch["size"]]
+            existing = live_chapters.get(ch["title"])
+            if existing is None:
+                changes["insert_chapters"].append(row)
+            elif list(existing) != row[2:]:
+                changes["update_chapters"].append(row)
+        changes["delete_chapters"].extend([name, title] for title in live_chapters if title not in titles)
+
+        live_prereqs = live["prerequisites"].get(name, {})
+        required = {p["topic"]: p.get("required_score", 0.7) for p in topic["prerequisites"]}
+        changes["set_prerequisites"].extend(
+            [name, prereq, score] for prereq, score in required.items() if live_prereqs.get(prereq) != score
+        )
+        changes["delete_prerequisites"].extend([name, prereq] for prereq in live_prereqs if prereq not in required)
+
+    changes["delete_topics"] = [name for name in live["topics"] if name not in wanted]
+    return changes
+
+
+def summarize(changes):
+    return {kind: len(rows) for kind, rows in changes.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the catalog from content/topics and optionally seed the graph.")
+    parser.add_argument("--seed", action="store_true", help="apply the diff to the graph with the seed_catalog walker")
+    parser.add_argument("--dry-run", action="store_true", help="with --seed, report the diff without applying it")
+    parser.add_argument("--reorder", nargs=3, metavar=("TOPIC", "TITLE", "ORDER"), help="move a chapter in the source first")
+    args = parser.parse_args()
+
+    if args.reorder:
+        topic_name, chapter_title, order = args.reorder
+        try:
+            print(f"Reordered {reorder(topic_name, chapter_title, int(order))}")
+        except KeyError as e:
+            parser.error(f"not in {SOURCE_DIR}: {e}")
+
+    compiled = build()
+    print(f"Catalog: {len(compiled['topics'])} topics, {sum(len(t['chapters']) for t in compiled['topics'])} chapters")
+    if not args.seed:
+        return 0
+    # The catalog is replicated on every shard, so each one is seeded
+    router = ShardRouter()
+    statuses = []
+    for shard in range(router.shards):
+        cmd = [sys.executable, "-m", "jaclang", "run", "main.jac", "-w", "seed_catalog"]
+        if router.shards > 1:
+            cmd += ["--session", router.session_path(shard)]
+        if args.dry_run:
+            cmd += ["--args", "dry_run=true"]
+        statuses.append(subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=router.env(shard)).returncode)
+    failed = [shard for shard, status in enumerate(statuses) if status]
+    if failed:
+        print(f"seeding failed on shard(s) {', '.join(map(str, failed))}", file=sys.stderr)
+        return statuses[failed[0]]
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Denormalized virtual classroom rosters with live occupancy counters.
+
+Each classroom keeps its participants in a username-keyed dict alongside
+active/muted/hand-raised counters that are adjusted on join and leave.
+Listing classrooms reads the counters and a cached per-classroom view
+instead of walking classroom_session and participant for every room.
+
+Seats are handed out by ``admit``, which checks capacity and takes the seat
+under the same lock, so a burst of joins can never overshoot capacity. Students
+who find the room full wait in a FIFO queue and are seated as others leave.
+The registry lives in the server (``classroom_gate``), the one process that
+sees every join and leave.
+"""
+import threading
+from collections import deque
+
+CLASSROOM_FIELDS = (
+    "name", "instructor", "capacity", "active_students", "meeting_url", "is_live",
+    "whiteboard_content", "chat_enabled", "recording_enabled", "breakout_rooms",
+    "screen_sharing", "current_presenter",
+)
+
+
+class Roster:
+    __slots__ = ("info", "members", "active", "muted", "hands_raised", "view", "waitlist", "waiting", "tickets", "seated")
+
+    def __init__(self, info):
+        self.info = {field: info.get(field) for field in CLASSROOM_FIELDS}
+        # username -> [role, is_muted, camera_on, hand_raised]
+        self.members = {}
+        self.active = int(info.get("active_students") or 0)
+        self.muted = 0
+        self.hands_raised = 0
+        self.view = None
+        # FIFO of (ticket, username, role); waiting maps username -> ticket and
+        # entries whose ticket no longer matches were cancelled.
+        self.waitlist = deque()
+        self.waiting = {}
+        self.tickets = 0
+        self.seated = 0
+
+    def admit(self, username, role):
+        if username in self.members:
+            return {"status": "joined"}
+        capacity = self.info["capacity"] or 0
+        if role != "student" or self.active < capacity:
+            self.add(username, role, True, False, False)
+            return {"status": "admitted"}
+        ticket = self.waiting.get(username)
+        if ticket is None:
+            self.tickets += 1
+            ticket = self.waiting[username] = self.tickets
+            self.waitlist.append((ticket, username, role))
+            self.view = None
+        return {"status": "waitlisted", "position": ticket - self.seated}
+
+    def seat_waiting(self):
+        """Seat waitlisted students while there is room; return their usernames."""
+        seated = []
+        capacity = self.info["capacity"] or 0
+        while self.waitlist and self.active < capacity:
+            ticket, username, role = self.waitlist.popleft()
+            self.seated = ticket
+            if self.waiting.get(username) != ticket:
+                continue
+            del self.waiting[username]
+            self.add(username, role, True, False, False)
+            seated.append(username)
+        return seated
+
+    def add(self, username, role, is_muted, camera_on, hand_raised):
+        previous = self.members.get(username)
+        if previous is not None:
+            self._uncount(previous)
+        member = self.members[username] = [role, bool(is_muted), bool(camera_on), bool(hand_raised)]
+        self._count(member)
+        if previous is None and role == "student":
+            self.active += 1
+        self.view = None
+
+    def remove(self, username):
+        if self.waiting.pop(username, None) is not None:
+            self.view = None
+            return True
+        member = self.members.pop(username, None)
+        if member is None:
+            return False
+        self._uncount(member)
+        if member[0] == "student":
+            self.active = max(self.active - 1, 0)
+        self.view = None
+        return True
+
+    def render(self):
+        if self.view is None:
+            capacity = self.info["capacity"] or 0
+            self.view = dict(
+                self.info,
+                active_students=self.active,
+                available_spots=max(capacity - self.active, 0),
+                muted_count=self.muted,
+                hands_raised=self.hands_raised,
+                waitlist=len(self.waiting),
+                participants=[
+                    {"username": username, "role": role, "is_muted": is_muted, "camera_on": camera_on, "hand_raised": hand_raised}
+                    for username, (role, is_muted, camera_on, hand_raised) in self.members.items()
+                ],
+            )
+        return self.view
+
+    def _count(self, member):
+        self.muted += member[1]
+        self.hands_raised += member[3]
+
+    def _uncount(self, member):
+        self.muted -= member[1]
+        self.hands_raised -= member[3]
+
+
+class ClassroomRegistry:
+    def __init__(self, source=None):
+        # source() returns [{"classroom": {...}, "participants": [{...}]}] from the graph.
+        self.source = source
+        self._lock = threading.Lock()
+        self._rosters = None
+        # Bumped on every change, so listings can be validated with an ETag
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def configure(self, source=None):
+        with self._lock:
+            if source is not None:
+                self.source = source
+            self._rosters = None
+            self._version += 1
+
+    def admit(self, classroom_name, username, role="student"):
+        """Atomically take a seat or join the waitlist.
+
+        Returns a dict with ``status`` ("admitted", "joined" if already present,
+        or "waitlisted" with a ``position``) and the classroom's seat counters.
+        """
+        with self._lock:
+            roster = self._roster(classroom_name)
+            result = roster.admit(username, role)
+            if result["status"] != "joined":
+                self._version += 1
+            result.update(active_students=roster.active, capacity=roster.info["capacity"])
+            return result
+
+    def leave(self, classroom_name, username):
+        """Free the seat (or waitlist spot) and seat waiting students in order.
+
+        Returns ``{"left": bool, "admitted": [usernames seated from the waitlist]}``.
+        """
+        with self._lock:
+            roster = self._roster(classroom_name)
+            left = roster.remove(username)
+            admitted = roster.seat_waiting()
+            if left or admitted:
+                self._version += 1
+            return {"left": left, "admitted": admitted}
+
+    def get(self, classroom_name):
+        with self._lock:
+            roster = self._ensure_loaded().get(classroom_name)
+            return roster.render() if roster is not None else None
+
+    def listing(self):
+        with self._lock:
+            return [roster.render() for roster in self._ensure_loaded().values()]
+
+    def _roster(self, classroom_name):
+        roster = self._ensure_loaded().get(classroom_name)
+        if roster is None:
+            raise KeyError(classroom_name)
+        return roster
+
+    def _ensure_loaded(self):
+        if self._rosters is None:
+            # Built aside, so a failed source leaves the registry unloaded and the next call retries
+            rosters = {}
+            for entry in (self.source() if self.source is not None else []):
+                roster = rosters[entry["classroom"]["name"]] = Roster(entry["classroom"])
+                for p in entry.get("participants", []):
+                    member = roster.members[p["username"]] = [
+                        p.get("role", "student"), bool(p.get("is_muted")), bool(p.get("camera_on")), bool(p.get("hand_raised")),
+                    ]
+                    roster._count(member)
+            self._rosters = rosters
+        return self._rosters
+
+
+def replay_seats(classrooms, records):
+    """Apply logged ``session`` and ``leave`` records to a classroom listing.
+
+    A snapshot's listing predates the joins and leaves logged after it, and
+    the graph only catches up once replay_log has run. ``classrooms`` is in
+    the shape ``ClassroomRegistry`` loads and is updated in place.
+    """
+    rooms = {entry["classroom"]["name"]: entry["participants"] for entry in classrooms}
+    for op, args in records:
+        participants = rooms.get(args[0]) if op in ("session", "leave") else None
+        if participants is None:
+            continue
+        participants[:] = [p for p in participants if p["username"] != args[1]]
+        if op == "session":
+            participants.append({"username": args[1], "role": args[2], "is_muted": True, "camera_on": False, "hand_raised": False})
+    return classrooms
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Cohort-level aggregates for the instructor dashboard.
+
+Every report is computed with array operations over ``mastery_matrix`` and
+``progress_matrix`` and cached against the graph version, so repeated
+dashboard refreshes return the cached dict until a mastery, chapter progress
+or prerequisite change bumps the version. The matrices and this cache live in
+the server process, kept current by ``learner_feed``.
+"""
+import threading
+
+import numpy as np
+
+from mastery_matrix import mastery_matrix, progress_matrix
+from prereq_dag import prereq_index
+
+STUCK_SAMPLE = 50
+
+
+class CohortAnalytics:
+    def __init__(self, mastery=mastery_matrix, progress=progress_matrix, prereqs=prereq_index, chapters=None):
+        # chapters(topic_name) returns that topic's chapter titles in order.
+        self.mastery = mastery
+        self.progress = progress
+        self.prereqs = prereqs
+        self.chapters = chapters
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._cache_version = None
+
+    def configure(self, chapters=None):
+        if chapters is not None:
+            self.chapters = chapters
+        with self._lock:
+            self._cache.clear()
+
+    def graph_version(self):
+        return (self.mastery.version, self.progress.version, self.prereqs.version)
+
+    def topic_distribution(self, topic_name, bins=10):
+        return self._cached(("topic", topic_name, bins), lambda: self._topic_distribution(topic_name, bins))
+
+    def chapter_funnel(self, topic_name):
+        return self._cached(("funnel", topic_name), lambda: self._chapter_funnel(topic_name))
+
+    def stuck_learners(self, topic_name=None):
+        return self._cached(("stuck", topic_name), lambda: self._stuck_learners(topic_name))
+
+    def _cached(self, key, compute):
+        version = self.graph_version()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] == version:
+                return hit[1]
+        result = compute()
+        with self._lock:
+            if version != self._cache_version:
+                # Entries from older versions can never be hit again.
+                self._cache.clear()
+                self._cache_version = version
+            self._cache[key] = (version, result)
+        return result
+
+    def _topic_distribution(self, topic_name, bins):
+        return {
+            "topic": topic_name,
+            "learners": self.mastery.count(topic_name),
+            "mean": self.mastery.mean(topic_name),
+            "percentiles": {f"p{q}": v for q, v in self.mastery.percentiles(topic_name).items()},
+            "histogram": self.mastery.histogram(topic_name, bins),
+        }
+
+    def _chapter_funnel(self, topic_name):
+        titles = list(self.chapters(topic_name)) if self.chapters is not None else []
+        n = self.progress.learner_count
+        reached = np.ones(n, dtype=bool)
+        steps = []
+        for title in titles:
+            scores, valid = self.progress.column(title)
+            completed = np.zeros(n, dtype=bool)
+            completed[:scores.size] = valid & (scores >= 1.0)
+            started = np.zeros(n, dtype=bool)
+            started[:valid.size] = valid
+            # A learner stays in the funnel only while every earlier chapter is done.
+            reached &= completed
+            steps.append({
+                "chapter": title,
+                "started": int(np.count_nonzero(started)),
+                "completed": int(np.count_nonzero(completed)),
+                "completed_through": int(np.count_nonzero(reached)),
+            })
+        return {"topic": topic_name, "learners": n, "funnel": steps}
+
+    def _stuck_learners(self, topic_name):
+        groups = []
+        for topic, prereq, required in self.prereqs.edges():
+            if topic_name is not None and topic != topic_name:
+                continue
+            scores, valid = self.mastery.column(prereq)
+            stuck = np.flatnonzero(valid & (scores < required))
+            groups.append({
+                "topic": topic,
+                "prerequisite": prereq,
+                "required": required,
+                "attempted": int(np.count_nonzero(valid)),
+                "stuck": int(stuck.size),
+                "learners": self.mastery.learners(stuck[:STUCK_SAMPLE]),
+            })
+        return {"topic": topic_name, "prerequisites": groups}
+
+
+cohort_analytics = CohortAnalytics()
@@ -26,6 +26,10 @@ export default function App() {
   const [classrooms, setClassrooms] = useState([])
   const [schedule, setSchedule] = useState([])
   const [chapters, setChapters] = useState([])
+  const [chapterTopic, setChapterTopic] = useState('')
+  const [chapterCursor, setChapterCursor] = useState(null)
+  const [openChapter, setOpenChapter] = useState(null)
+  const [chapterBodies, setChapterBodies] = useState({})
   const editorRef = useRef(null)
 
   const handleEditorDidMount = (editor, monaco) => {
@@ -147,20 +151,38 @@ export default function App() {
     }
   }
 
-  const loadChapters = async (topicName) => {
+  const loadChapters = async (topicName, cursor = null) => {
     if (!topicName) return
     console.log('Loading chapters for:', topicName)
     try {
-      const res = await fetch(`${API}/chapters/${topicName}`)
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+      const res = await fetch(`${API}/chapters/${encodeURIComponent(topicName)}${query}`)
       console.log('Response status:', res.status)
       const data = await res.json()
       console.log('Chapter data:', data)
-      setChapters(data.chapters || [])
+      const page = data.chapters || []
+      setChapters(prev => cursor ? [...prev, ...page] : page)
+      setChapterTopic(topicName)
+      setChapterCursor(data.next_cursor || null)
+      if (!cursor && page.length > 0) openChapterBody(page[0].hash)
     } catch (e) {
       console.error('Chapter loading error:', e)
     }
   }
 
+  // Bodies are fetched one chapter at a time, by content hash
+  const openChapterBody = async (hash) => {
+    setOpenChapter(hash)
+    if (chapterBodies[hash] !== undefined) return
+    try {
+      const res = await fetch(`${API}/chapter-content/${hash}`)
+      const data = await res.json()
+      setChapterBodies(prev => ({...prev, [hash]: data.content || ''}))
+    } catch (e) {
+      console.error('Chapter content error:', e)
+    }
+  }
+
   const completeChapter = async (chapterTitle) => {
     try {
       const res = await fetch(`${API}/complete-chapter`, {
@@ -326,11 +348,12 @@ export default function App() {
             <div style={{marginTop: '20px'}}>
               {chapters.map((ch, i) => (
                 <div key={i} style={{background: '#21262d', border: '1px solid #30363d', borderRadius: '6px', padding: '20px', marginBottom: '15px'}}>
-                  <h3 style={{marginBottom: '10px'}}>Chapter {ch.order}: {ch.title}</h3>
-                  <div style={{color: '#c9d1d9', marginBottom: '15px', lineHeight: '1.6', whiteSpace: 'pre-wrap'}}>{ch.content}</div>
-                  {ch.title.includes('Nodes') && (
-                    <div style={{background: '#0d1117', border: '1px solid #30363d', borderRadius: '4px', padding: '10px', marginBottom: '10px'}}>
-                      <pre style={{color: '#58a6ff', fontSize: '12px', margin: 0}}>{
+                  <h3 onClick={() => openChapterBody(ch.hash)} style={{marginBottom: '10px', cursor: 'pointer'}}>Chapter {ch.order}: {ch.title}</h3>
+                  {openChapter === ch.hash && (<>
+                    <div style={{color: '#c9d1d9', marginBottom: '15px', lineHeight: '1.6', whiteSpace: 'pre-wrap'}}>{chapterBodies[ch.hash] ?? 'Loading...'}</div>
+                    {ch.title.includes('Nodes') && (
+                      <div style={{background: '#0d1117', border: '1px solid #30363d', borderRadius: '4px', padding: '10px', marginBottom: '10px'}}>
+                        <pre style={{color: '#58a6ff', fontSize: '12px', margin: 0}}>{
 `node person {
     has name: str;
     has age: int;
@@ -338,22 +361,26 @@ export default function App() {
 edge friendship {
     has since: str;
 }`}</pre>
-                    </div>
-                  )}
-                  {ch.title.includes('Walker') && (
-                    <div style={{background: '#0d1117', border: '1px solid #30363d', borderRadius: '4px', padding: '10px', marginBottom: '10px'}}>
-                      <pre style={{color: '#58a6ff', fontSize: '12px', margin: 0}}>{
+                      </div>
+                    )}
+                    {ch.title.includes('Walker') && (
+                      <div style={{background: '#0d1117', border: '1px solid #30363d', borderRadius: '4px', padding: '10px', marginBottom: '10px'}}>
+                        <pre style={{color: '#58a6ff', fontSize: '12px', margin: 0}}>{
 `walker greet {
     can say_hello with person entry {
         print(f"Hello {here.name}!");
         report "Greeted";
     }
 }`}</pre>
-                    </div>
-                  )}
-                  <button onClick={() => completeChapter(ch.title)} style={{background: '#238636', color: 'white', border: 'none', padding: '8px 16px', borderRadius: '4px', cursor: 'pointer'}}>Complete Chapter</button>
+                      </div>
+                    )}
+                    <button onClick={() => completeChapter(ch.title)} style={{background: '#238636', color: 'white', border: 'none', padding: '8px 16px', borderRadius: '4px', cursor: 'pointer'}}>Complete Chapter</button>
+                  </>)}
                 </div>
               ))}
+              {chapterCursor && (
+                <button onClick={() => loadChapters(chapterTopic, chapterCursor)} style={{background: 'transparent', color: '#58a6ff', border: '1px solid #30363d', padding: '8px 16px', borderRadius: '4px', cursor: 'pointer'}}>Load more chapters</button>
+              )}
             </div>
           </div>
         )}
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Binary snapshot of the whole graph with memory-mapped, lazy restore.
+
+Layout (little endian):
+
+    header   magic, version, node/edge counts, mutation log position, section offsets
+    types    marshal'd [(archetype name, node count)]
+    by type  uint32 node ids grouped by archetype, in ``types`` order
+    nodes    node_count x (data offset, data length, type id, first edge, edge count)
+    edges    edge_count x (data offset, data length, type id, source, target)
+    data     marshal'd field dicts, one per node and edge
+
+Edges are stored grouped by source node, so a node's out-edges are one slice
+of the edge index, and nodes of one archetype are one slice of the by-type
+section. Opening a snapshot maps the file and reads the header and type table
+only; records are decoded when they are first touched, so startup cost does
+not grow with the catalog. Node 0 is always the root.
+
+The header records the mutation_log position the snapshot covers; recovery
+replays the log from there.
+"""
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from participant_store import live_participants
+
+MAGIC = b"ILPSNAP1"
+VERSION = 2
+HEADER = struct.Struct("<8sHxxxxxxQQQQQQQQQ")
+NODE = struct.Struct("<QIHxxII")
+EDGE = struct.Struct("<QIHxxII")
+
+SNAPSHOT_PATH = os.environ.get(
+    "GRAPH_SNAPSHOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "graph.snap")
+)
+
+
+def archetype_fields(obj):
+    """Public ``has`` fields of a node or edge archetype."""
+    return {k: v for k, v in vars(obj).items() if not k.startswith("_")}
+
+
+def out_edges(node):
+    """(edge, target) archetype pairs leaving ``node``."""
+    anchor = node.__jac__
+    return [
+        (edge.archetype, edge.target.archetype)
+        for edge in anchor.edges
+        if edge.source is anchor
+    ]
+
+
+def capture(root):
+    """Walk everything reachable from ``root`` into a SnapshotWriter."""
+    writer = SnapshotWriter()
+    ids = {id(root): writer.add_node("root", {})}
+    queue = [root]
+    while queue:
+        node = queue.pop()
+        for edge, target in out_edges(node):
+            if id(target) not in ids:
+                ids[id(target)] = writer.add_node(type(target).__name__, archetype_fields(target))
+                queue.append(target)
+            writer.add_edge(type(edge).__name__, ids[id(node)], ids[id(target)], archetype_fields(edge))
+    return writer
+
+
+class SnapshotWriter:
+    def __init__(self):
+        self._types = {}
+        self._nodes = []
+        self._edges = []
+
+    def add_node(self, type_name, fields):
+        self._nodes.append((self._type(type_name), marshal.dumps(fields)))
+        return len(self._nodes) - 1
+
+    def add_edge(self, type_name, source, target, fields):
+        self._edges.append((source, self._type(type_name), target, marshal.dumps(fields)))
+
+    def write(self, path=SNAPSHOT_PATH, position=(0, 0)):
+        """Write the snapshot atomically (temp file, fsync, rename)."""
+        self._edges.sort(key=lambda e: e[0])
+        first_edge = [0] * len(self._nodes)
+        edge_count = [0] * len(self._nodes)
+        for i, (source, _, _, _) in enumerate(self._edges):
+            if not edge_count[source]:
+                first_edge[source] = i
+            edge_count[source] += 1
+
+        by_type = [array("I") for _ in self._types]
+        for i, (type_id, _) in enumerate(self._nodes):
+            by_type[type_id].append(i)
+        if sys.byteorder == "big":
+            for ids in by_type:
+                ids.byteswap()
+        types = marshal.dumps([(name, len(by_type[type_id])) for name, type_id in self._types.items()])
+        types_at = HEADER.size
+        by_type_at = types_at + len(types)
+        nodes_at = by_type_at + 4 * len(self._nodes)
+        edges_at = nodes_at + NODE.size * len(self._nodes)
+        data_at = edges_at + EDGE.size * len(self._edges)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snap-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, len(self._nodes), len(self._edges), position[0], position[1], types_at, by_type_at, nodes_at, edges_at, data_at))
+                f.write(types)
+                for ids in by_type:
+                    ids.tofile(f)
+                offset = data_at
+                for i, (type_id, data) in enumerate(self._nodes):
+                    f.write(NODE.pack(offset, len(data), type_id, first_edge[i], edge_count[i]))
+                    offset += len(data)
+                for source, type_id, target, data in self._edges:
+                    f.write(EDGE.pack(offset, len(data), type_id, source, target))
+                    offset += len(data)
+                for _, data in self._nodes:
+                    f.write(data)
+                for _, _, _, data in self._edges:
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return path
+
+    def _type(self, type_name):
+        return self._types.setdefault(type_name, len(self._types))
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.node_count, self.edge_count, segment, offset, types_at, by_type_at, self._nodes_at, self._edges_at, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} graph snapshot")
+        self.position = (segment, offset)
+        self.types = []
+        # archetype name -> (first byte, last byte) of its ids in the by-type section
+        self._by_type = {}
+        offset = by_type_at
+        for name, count in marshal.loads(self._map[types_at:by_type_at]):
+            self.types.append(name)
+            self._by_type[name] = (offset, offset + 4 * count)
+            offset += 4 * count
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def node_type(self, i):
+        return self.types[NODE.unpack_from(self._map, self._nodes_at + i * NODE.size)[2]]
+
+    def node(self, i):
+        """(type name, fields) of node ``i``, decoded on demand."""
+        offset, length, type_id, _, _ = NODE.unpack_from(self._map, self._nodes_at + i * NODE.size)
+        return self.types[type_id], marshal.loads(self._map[offset:offset + length])
+
+    def edges(self, i):
+        """[(type name, target, fields)] for the out-edges of node ``i``."""
+        _, _, _, first, count = NODE.unpack_from(self._map, self._nodes_at + i * NODE.size)
+        result = []
+        for j in range(first, first + count):
+            offset, length, type_id, _, target = EDGE.unpack_from(self._map, self._edges_at + j * EDGE.size)
+            result.append((self.types[type_id], target, marshal.loads(self._map[offset:offset + length])))
+        return result
+
+    def nodes_of_type(self, type_name):
+        """Ids of every node with the given archetype name."""
+        start, end = self._by_type.get(type_name, (0, 0))
+        ids = array("I", self._map[start:end])
+        if sys.byteorder == "big":
+            ids.byteswap()
+        return ids
+
+
+def classrooms(snapshot):
+    """Classroom roster entries in the shape ``ClassroomRegistry`` loads."""
+    entries = {}
+    for i in snapshot.nodes_of_type("virtual_classroom"):
+        _, fields = snapshot.node(i)
+        entries[i] = {"classroom": fields, "participants": []}
+        # Compact sessions (PARTICIPANT_STORAGE=compact) are rows of the classroom's pages
+        for _, target, _ in snapshot.edges(i):
+            if snapshot.node_type(target) == "session_page":
+                entries[i]["participants"].extend(live_participants(snapshot.node(target)[1]["rows"]))
+    for i in snapshot.nodes_of_type("participant"):
+        _, fields = snapshot.node(i)
+        for kind, target, session in snapshot.edges(i):
+            if kind == "classroom_session" and target in entries and not session.get("ended_at"):
+                entries[target]["participants"].append(fields)
+    return list(entries.values())
+
+
+def write_snapshot(root, path=SNAPSHOT_PATH, position=(0, 0)):
+    return capture(root).write(path, position)
+
+
+def open_snapshot(path=SNAPSHOT_PATH):
+    return Snapshot(path) if os.path.exists(path) else None
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""ETags, conditional GETs and Cache-Control for catalog-style responses.
+
+Handlers pass ``encoded_json`` a strong ETag derived from whatever versions
+the body depends on (the catalog file hash, the classroom registry counter)
+and a function that builds the body. A request whose ``If-None-Match``
+matches gets a 304 and the body is never built. Otherwise the body is served
+from ``response_cache`` as bytes encoded once per version.
+"""
+import hashlib
+import os
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from json_codec import dumps
+from response_cache import negotiate, response_cache
+
+# Catalog bodies only change on a re-seed; clients revalidate after a minute.
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+# Live counters: always revalidate, but a 304 still saves the body.
+LIVE_CACHE_CONTROL = "no-cache"
+# Content-addressed bodies never change under the same URL.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Counters restart at zero with the process, so their ETags include this.
+INSTANCE = os.urandom(8).hex()
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: renders with ``json_codec`` (orjson if installed)."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def raw_json(body, headers=None):
+    """Send already-encoded JSON bytes without decoding them again."""
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def encoded_json(request: Request, etag, key, build, cache_control=CATALOG_CACHE_CONTROL, cache=response_cache):
+    """Conditional GET served from cached, precompressed bytes.
+
+    Each content coding is its own representation, so it gets its own strong
+    ETag (``"<etag>-gzip"``); any of them validates a conditional request.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    for coding in ("br", "gzip", "identity"):
+        if etag_matches(if_none_match, _variant_etag(etag, coding)):
+            headers = {"ETag": _variant_etag(etag, coding), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+            return Response(status_code=304, headers=headers)
+    body = cache.get(key, lambda: dumps(build()))
+    coding = negotiate(request.headers.get("accept-encoding"), tuple(body.variants))
+    headers = {"ETag": _variant_etag(etag, coding), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return raw_json(body.variants[coding], headers)
+
+
+def _variant_etag(etag, coding):
+    return etag if coding == "identity" else f'{etag[:-1]}-{coding}"'
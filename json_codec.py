@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""JSON encoding for responses and walker output.
+
+Uses ``orjson`` when it is installed and falls back to the standard library.
+Both produce compact UTF-8 bytes, so handlers can build a body once and send
+it as is. NaN and infinities are written as ``null`` by both, where
+``json.dumps`` would write ``NaN`` and Starlette's JSONResponse would raise.
+orjson raises on non-string keys, so payloads must stick to plain JSON types.
+"""
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+if orjson is not None:
+    def dumps(obj):
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+    def dumps(obj):
+        try:
+            return _encoder.encode(obj).encode("utf-8")
+        except ValueError:
+            # A NaN or infinity somewhere; write it as null, as orjson does
+            return _encoder.encode(_finite(obj)).encode("utf-8")
+
+    def _finite(obj):
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else None
+        if isinstance(obj, dict):
+            return {key: _finite(value) for key, value in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [_finite(value) for value in obj]
+        return obj
+
+    loads = json.loads
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Server-side owner of the learner matrices, fed by the mutation logs.
+
+Walkers run in one-shot ``jac run`` processes, so state they keep in memory
+is rebuilt from the graph on every request. ``learner_feed`` keeps
+``mastery_matrix``, ``progress_matrix`` and ``prereq_index`` in the server
+process instead. They are loaded by the ``export_learner_state`` walker,
+broadcast to every shard, on a background thread the server starts at
+startup (``start``). After that, ``refresh`` applies the mastery and chapter
+records each shard has appended to its log since. A mastery record also
+refreshes the unlock state of the topics downstream of it, for learners the
+index has already loaded.
+
+A ``reload`` record (written after a bulk import or a catalog re-seed)
+reloads everything from the graph and carries on after it. So does a log
+position lost to compaction. Requests never run the export: until the
+loader is done they are served from what is loaded, and a failed export is
+retried after ``FEED_RETRY_SECONDS``, doubling up to ``FEED_RETRY_MAX_SECONDS``.
+"""
+import logging
+import os
+import threading
+import time
+
+from mastery_matrix import mastery_matrix, progress_matrix
+from mutation_log import LogCompacted
+from prereq_dag import prereq_index
+
+log = logging.getLogger(__name__)
+
+FEED_RETRY_SECONDS = float(os.environ.get("FEED_RETRY_SECONDS", "1"))
+FEED_RETRY_MAX_SECONDS = float(os.environ.get("FEED_RETRY_MAX_SECONDS", "60"))
+
+
+class LearnerFeed:
+    def __init__(self, export=None, logs=(), mastery=mastery_matrix, progress=progress_matrix, prereqs=prereq_index):
+        # export() returns one export_learner_state report per shard, in shard
+        # order; logs are the shards' MutationLogs in the same order.
+        self.export = export
+        self.logs = list(logs)
+        self.mastery = mastery
+        self.progress = progress
+        self.prereqs = prereqs
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._state = {"topics": [], "edges": [], "mastery": [], "progress": []}
+        self._positions = None
+        # Set until a load is installed; refresh leaves the log positions alone meanwhile
+        self._wanted = threading.Event()
+        self._wanted.set()
+        # Take the positions from the next export rather than keeping ours
+        self._reposition = True
+        self._thread = None
+        mastery.configure(source=lambda: self._state["mastery"])
+        progress.configure(source=lambda: self._state["progress"])
+        prereqs.configure(source=lambda: self._state, load=mastery.scores_for)
+
+    def configure(self, export=None, logs=None):
+        with self._lock:
+            if export is not None:
+                self.export = export
+            if logs is not None:
+                self.logs = list(logs)
+            self._reposition = True
+            self._wanted.set()
+
+    def start(self):
+        """Load on a daemon thread now, and again whenever the logs call for it."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="learner-feed", daemon=True)
+            self._thread.start()
+
+    def refresh(self):
+        """Apply what was logged since the last call; False if nothing is loaded yet."""
+        with self._lock:
+            if self._positions is None:
+                return False
+            if not self._wanted.is_set():
+                try:
+                    self._follow()
+                except LogCompacted:
+                    self._reposition = True
+                    self._wanted.set()
+            return True
+
+    def load(self):
+        """Export the learner state from every shard and follow the logs from there.
+
+        The export runs without the lock, so requests keep being served from
+        the previous state meanwhile. They don't follow the logs until it is
+        installed, so nothing they apply is overwritten by an older export.
+        """
+        reports = self.export() if self.export is not None else []
+        if None in reports or len(reports) != len(self.logs):
+            raise RuntimeError("learner state export failed on a shard")
+        with self._lock:
+            self._install(reports)
+            self._wanted.clear()
+            try:
+                self._follow()
+            except LogCompacted:
+                self._reposition = True
+                self._wanted.set()
+
+    def _run(self):
+        delay = FEED_RETRY_SECONDS
+        while True:
+            self._wanted.wait()
+            try:
+                self.load()
+            except Exception:
+                log.exception("learner feed: load failed, retrying in %.0fs", delay)
+                time.sleep(delay)
+                delay = min(delay * 2, FEED_RETRY_MAX_SECONDS)
+            else:
+                delay = FEED_RETRY_SECONDS
+
+    def _follow(self):
+        for n, wal in enumerate(self.logs):
+            for op, args, position in wal.follow(self._positions[n]):
+                self._positions[n] = position
+                if op == "reload":
+                    # Positions stay just past the marker; the loader picks up from there
+                    self._wanted.set()
+                    return
+                self._apply(op, args)
+
+    def _apply(self, op, args):
+        if op == "mastery":
+            self.mastery.set(args[0], args[1], args[2])
+            self.prereqs.on_mastery(args[0], args[1], args[2])
+        elif op == "chapter":
+            self.progress.set(args[0], args[1], 1.0)
+
+    def _install(self, reports):
+        # Topics and prerequisites are replicated; learner rows live on their owner's shard
+        first = reports[0] if reports else {"topics": [], "edges": []}
+        self._state = {
+            "topics": first["topics"],
+            "edges": first["edges"],
+            "mastery": [row for report in reports for row in report["mastery"]],
+            "progress": [row for report in reports for row in report["progress"]],
+        }
+        if self._reposition or self._positions is None:
+            self._positions = [tuple(report["position"]) for report in reports]
+            self._reposition = False
+        self.mastery.invalidate()
+        self.progress.invalidate()
+        self.prereqs.invalidate()
+        self.reloads += 1
+
+
+learner_feed = LearnerFeed()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Streaming bulk import of learners, mastery and chapter progress.
+
+Rows are read from CSV or JSONL one at a time, validated, and handed out in
+fixed-size batches, so memory stays constant however large the file is. The
+``import_learners`` walker in main.jac applies each batch to the graph
+(upserting by username) and commits it as one transaction.
+
+Each row has a ``username`` and any of:
+
+    study_streak, total_time, current_topic   learner fields
+    topic, score                              a mastery edge (score in 0..1)
+    chapter, completed, completion_date       a chapter_progress edge
+
+Usage:
+    python learner_import.py learners.csv            # validate and import
+    python learner_import.py learners.jsonl --check  # validate only
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+from shard_router import ShardRouter
+
+MAX_REPORTED_ERRORS = 20
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+FALSE_VALUES = {"0", "false", "no", "n", "f", ""}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def _int(row, field):
+    value = row.get(field)
+    if value in (None, ""):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} must be an integer, got {value!r}") from None
+    if number < 0:
+        raise ImportRowError(f"{field} must not be negative")
+    return number
+
+
+def _bool(row, field):
+    value = row.get(field)
+    if isinstance(value, bool):
+        return value
+    text = str(value or "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ImportRowError(f"{field} must be a boolean, got {value!r}")
+
+
+def validate(row):
+    """Return the normalized row, or raise ImportRowError."""
+    username = str(row.get("username") or "").strip()
+    if not username:
+        raise ImportRowError("username is required")
+    clean = {"username": username}
+
+    for field in ("study_streak", "total_time"):
+        value = _int(row, field)
+        if value is not None:
+            clean[field] = value
+    if row.get("current_topic"):
+        clean["current_topic"] = str(row["current_topic"])
+
+    topic = str(row.get("topic") or "").strip()
+    if topic:
+        try:
+            score = float(row.get("score"))
+        except (TypeError, ValueError):
+            raise ImportRowError(f"score must be a number, got {row.get('score')!r}") from None
+        if not 0.0 <= score <= 1.0:
+            raise ImportRowError(f"score must be between 0 and 1, got {score}")
+        clean["topic"] = topic
+        clean["score"] = score
+
+    chapter = str(row.get("chapter") or "").strip()
+    if chapter:
+        clean["chapter"] = chapter
+        clean["completed"] = _bool(row, "completed")
+        clean["completion_date"] = str(row.get("completion_date") or "")
+    return clean
+
+
+def read_rows(path, fmt=None):
+    """Yield (row, error) pairs from a CSV or JSONL file, or stdin for "-"."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield row, None
+        else:
+            for line in f:
+                if not line.strip():
+                    yield None, None
+                    continue
+                try:
+                    yield json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield None, f"invalid JSON: {e.msg}"
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class LearnerImport:
+    def __init__(self, path, fmt=None, batch_size=10000, progress_every=100000, out=sys.stderr):
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.progress_every = progress_every
+        self.out = out
+        self.rows = 0
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+        self._started = None
+
+    def batches(self):
+        """Yield lists of validated rows; invalid rows are counted and skipped."""
+        self._started = time.monotonic()
+        batch = []
+        for row, error in read_rows(self.path, self.fmt):
+            if row is None and error is None:
+                continue
+            self.rows += 1
+            try:
+                if error is not None:
+                    raise ImportRowError(error)
+                if not isinstance(row, dict):
+                    raise ImportRowError("row must be an object")
+                batch.append(validate(row))
+            except ImportRowError as e:
+                self.rejected += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({"row": self.rows, "error": str(e)})
+            if len(batch) >= self.batch_size:
+                yield batch
+                self.imported += len(batch)
+                batch = []
+            if self.progress_every and self.rows % self.progress_every == 0:
+                self._progress()
+        if batch:
+            yield batch
+            self.imported += len(batch)
+        self._progress()
+
+    def summary(self):
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "seconds": round(elapsed, 2),
+            "rows_per_minute": int(self.rows / elapsed * 60) if elapsed else 0,
+        }
+
+    def _progress(self):
+        if self.out is None:
+            return
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        print(
+            f"[import] {self.rows:,} rows ({self.rejected:,} rejected) "
+            f"in {elapsed:.1f}s, {self.rows / elapsed * 60:,.0f} rows/min",
+            file=self.out,
+            flush=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import learners, mastery and chapter progress.")
+    parser.add_argument("path", help="CSV or JSONL file, or - for stdin")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--check", action="store_true", help="validate only, do not touch the graph")
+    args = parser.parse_args()
+
+    if args.check:
+        importer = LearnerImport(args.path, args.format, args.batch_size)
+        for _ in importer.batches():
+            pass
+        print(json.dumps(importer.summary(), indent=2))
+        return 1 if importer.rejected else 0
+    if args.path == "-":
+        parser.error("reading from stdin is only supported with --check")
+
+    walker_args = [f"path={os.path.abspath(args.path)}", f"batch_size={args.batch_size}"]
+    if args.format:
+        walker_args.append(f"fmt={args.format}")
+    router = ShardRouter()
+    statuses = []
+    for shard in range(router.shards):
+        cmd = [sys.executable, "-m", "jaclang", "run", "main.jac", "-w", "import_learners"]
+        if router.shards > 1:
+            cmd += ["--session", router.session_path(shard)]
+        for arg in walker_args:
+            cmd += ["--args", arg]
+        # Every shard imports its own learners, whatever happened on the others
+        statuses.append(subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=router.env(shard)).returncode)
+    failed = [shard for shard, status in enumerate(statuses) if status]
+    if failed:
+        print(f"import failed on shard(s) {', '.join(map(str, failed))}", file=sys.stderr)
+        return statuses[failed[0]]
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
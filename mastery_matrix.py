@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Dense learner x topic mastery matrix for cohort analytics.
+
+Scores are mirrored from the mastery edges (by ``learner_feed``, in the
+server) into a float32 array with a validity mask, so cohort questions
+("mean Walkers mastery", "how many learners are above 0.7") are single
+vectorized passes instead of walks over every learner. Each topic is stored
+as one contiguous row of length ``capacity``.
+"""
+import threading
+
+import numpy as np
+
+
+class MasteryMatrix:
+    def __init__(self, source=None, capacity=1024):
+        # source() yields (username, topic, score) rows for the initial load.
+        self.source = source
+        self.version = 0
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._capacity = capacity
+        self._topics = {}
+        self._learners = {}
+        self._usernames = []
+        self.scores = np.zeros((0, capacity), dtype=np.float32)
+        self.valid = np.zeros((0, capacity), dtype=bool)
+
+    def configure(self, source=None):
+        with self._lock:
+            if source is not None:
+                self.source = source
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+            self._topics.clear()
+            self._learners.clear()
+            self._usernames.clear()
+            self.scores = np.zeros((0, self._capacity), dtype=np.float32)
+            self.valid = np.zeros((0, self._capacity), dtype=bool)
+            self.version += 1
+
+    @property
+    def learner_count(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._usernames)
+
+    @property
+    def topics(self):
+        return list(self._topics)
+
+    def set(self, username, topic, score):
+        """Mastery listener: mirror one edge write into the matrix."""
+        with self._lock:
+            self._ensure_loaded()
+            self._set(username, topic, score)
+            self.version += 1
+
+    def load(self, rows):
+        """Bulk-load (username, topic, score) rows."""
+        with self._lock:
+            for username, topic, score in rows:
+                self._set(username, topic, score)
+            self.version += 1
+
+    def column(self, topic):
+        """Return (scores, valid) views for one topic, trimmed to known learners."""
+        with self._lock:
+            self._ensure_loaded()
+            j = self._topics.get(topic)
+            n = len(self._usernames)
+            if j is None:
+                return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool)
+            return self.scores[j, :n], self.valid[j, :n]
+
+    def scores_for(self, username):
+        """{topic: score} for one learner's valid entries."""
+        with self._lock:
+            self._ensure_loaded()
+            i = self._learners.get(username)
+            if i is None:
+                return {}
+            return {topic: float(self.scores[j, i]) for topic, j in self._topics.items() if self.valid[j, i]}
+
+    def learners(self, rows):
+        """Map row indices back to usernames."""
+        return [self._usernames[i] for i in rows]
+
+    def count(self, topic):
+        _, valid = self.column(topic)
+        return int(np.count_nonzero(valid))
+
+    def mean(self, topic):
+        scores, valid = self.column(topic)
+        total = np.count_nonzero(valid)
+        if not total:
+            return None
+        return float(np.sum(scores, where=valid, dtype=np.float64) / total)
+
+    def means(self):
+        """Mean score for every topic in one pass over the matrix."""
+        with self._lock:
+            self._ensure_loaded()
+            n = len(self._usernames)
+            totals = np.count_nonzero(self.valid[:, :n], axis=1)
+            sums = np.sum(self.scores[:, :n], axis=1, where=self.valid[:, :n], dtype=np.float64)
+            return {
+                topic: (float(sums[j] / totals[j]) if totals[j] else None)
+                for topic, j in self._topics.items()
+            }
+
+    def percentiles(self, topic, qs=(25, 50, 75, 90)):
+        scores, valid = self.column(topic)
+        values = scores[valid]
+        if not values.size:
+            return {q: None for q in qs}
+        return dict(zip(qs, (float(v) for v in np.percentile(values, qs))))
+
+    def histogram(self, topic, bins=10):
+        # Scores live in [0, 1], so equal-width buckets reduce to a bincount.
+        scores, valid = self.column(topic)
+        buckets = np.minimum((scores * bins).astype(np.int32), bins - 1)
+        counts = np.bincount(buckets[valid], minlength=bins)
+        edges = np.linspace(0.0, 1.0, bins + 1)
+        return {"counts": counts.tolist(), "edges": [round(float(e), 4) for e in edges]}
+
+    def count_above(self, topic, threshold):
+        scores, valid = self.column(topic)
+        return int(np.count_nonzero(valid & (scores >= threshold)))
+
+    def fraction_above(self, topic, threshold):
+        total = self.count(topic)
+        return self.count_above(topic, threshold) / total if total else 0.0
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._loaded = True
+            if self.source is not None:
+                for username, topic, score in self.source():
+                    self._set(username, topic, score)
+
+    def _set(self, username, topic, score):
+        j = self._topics.get(topic)
+        if j is None:
+            j = self._add_topic(topic)
+        i = self._learners.get(username)
+        if i is None:
+            i = self._add_learner(username)
+        self.scores[j, i] = score
+        self.valid[j, i] = True
+
+    def _add_topic(self, topic):
+        j = self._topics[topic] = len(self._topics)
+        self.scores = np.vstack([self.scores, np.zeros((1, self._capacity), dtype=np.float32)])
+        self.valid = np.vstack([self.valid, np.zeros((1, self._capacity), dtype=bool)])
+        return j
+
+    def _add_learner(self, username):
+        i = self._learners[username] = len(self._usernames)
+        self._usernames.append(username)
+        if i >= self._capacity:
+            self._grow(max(self._capacity * 2, i + 1))
+        return i
+
+    def _grow(self, capacity):
+        topics = len(self._topics)
+        scores = np.zeros((topics, capacity), dtype=np.float32)
+        valid = np.zeros((topics, capacity), dtype=bool)
+        scores[:, :self._capacity] = self.scores
+        valid[:, :self._capacity] = self.valid
+        self.scores, self.valid, self._capacity = scores, valid, capacity
+
+
+mastery_matrix = MasteryMatrix()
+# chapter_progress edges use the same layout: one row per chapter title,
+# 1.0 for completed and 0.0 for started.
+progress_matrix = MasteryMatrix()
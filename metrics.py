@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""In-process metrics in the Prometheus text format, with no client library.
+
+Counters and histograms keep one shard per thread. Recording a value touches
+only the calling thread's dict, so the request path never takes a lock. A
+scrape sums the shards. Gauges are callbacks read at scrape time.
+
+Walkers run in child Jac processes. With ``METRICS_CHILD=1`` (set by the
+shard router) a child prints what it recorded as one ``#metrics`` line on
+stderr when it exits, and the server merges that line into its own registry.
+This is how LLM latency and token counts reach ``/metrics``.
+"""
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+
+# Seconds; covers cached reads (sub-millisecond) up to LLM walker calls.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CHILD_PREFIX = "#metrics "
+
+
+class _Sharded:
+    def __init__(self, registry, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _label_text(self, values, extra=()):
+        return _label_text(self.labels, values, extra)
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self):
+        totals = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for labels, value in shard.copy().items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self):
+        return [f"{self.name}{self._label_text(labels)} {_number(value)}" for labels, value in sorted(self.values().items())]
+
+    def dump(self):
+        return [[list(labels), value] for labels, value in self.values().items()]
+
+    def load(self, rows):
+        for labels, value in rows:
+            self.inc(*labels, amount=value)
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels, buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            # per-bucket counts (the last one is +Inf), then sum and count
+            row = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def values(self):
+        totals = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for labels, row in shard.copy().items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(row)
+                else:
+                    for i, value in enumerate(row):
+                        total[i] += value
+        return totals
+
+    def render(self):
+        lines = []
+        for labels, row in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._label_text(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(row[-2])}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {row[-1]}")
+        return lines
+
+    def dump(self):
+        return [[list(labels), row] for labels, row in self.values().items()]
+
+    def load(self, rows):
+        shard = self._shard()
+        for labels, row in rows:
+            total = shard.setdefault(tuple(labels), [0] * len(row))
+            for i, value in enumerate(row):
+                total[i] += value
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, registry, name, help, labels=(), read=None):
+        # read() returns a number, or {label values tuple: number} when labelled.
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.read = read
+        registry.register(self)
+
+    def render(self):
+        value = self.read() if self.read is not None else 0
+        if not self.labels:
+            return [f"{self.name} {_number(value)}"]
+        return [f"{self.name}{_label_text(self.labels, labels)} {_number(v)}" for labels, v in sorted(value.items())]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def dump(self):
+        """Counters and histograms as JSON-able rows, for a child to send back."""
+        return {
+            name: metric.dump() for name, metric in self._metrics.items()
+            if metric.kind != "gauge" and metric.values()
+        }
+
+    def merge_child_output(self, stderr):
+        """Merge a child's ``#metrics`` line from its stderr; return the rest of stderr."""
+        if CHILD_PREFIX not in stderr:
+            return stderr
+        rest = []
+        for line in stderr.splitlines():
+            if line.startswith(CHILD_PREFIX):
+                try:
+                    for name, rows in json.loads(line[len(CHILD_PREFIX):]).items():
+                        metric = self._metrics.get(name)
+                        if metric is not None:
+                            metric.load(rows)
+                except (ValueError, TypeError):
+                    pass
+            else:
+                rest.append(line)
+        return "\n".join(rest)
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+http_request_seconds = Histogram(registry, "http_request_duration_seconds", "HTTP request latency by route.", ("route", "method"))
+http_requests = Counter(registry, "http_requests_total", "HTTP responses by route and status.", ("route", "status"))
+walker_seconds = Histogram(registry, "walker_duration_seconds", "Walker call time including the Jac subprocess.", ("walker",))
+subprocess_spawns = Counter(registry, "subprocess_spawns_total", "Subprocesses started by the server.", ("kind",))
+llm_seconds = Histogram(registry, "llm_call_duration_seconds", "LLM call latency by model.", ("model",))
+llm_tokens = Counter(registry, "llm_tokens_total", "LLM tokens by model and direction (estimated from characters when the client reports no usage).", ("model", "direction"))
+
+
+def clock():
+    return time.perf_counter()
+
+
+def llm_call(model, started, prompt, result):
+    """Record one LLM call that began at ``clock()`` == ``started``."""
+    llm_seconds.observe(time.perf_counter() - started, model)
+    usage = getattr(result, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens is None:
+        # ~4 characters per token for English text
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(str(result)) // 4
+    llm_tokens.inc(model, "prompt", amount=prompt_tokens)
+    llm_tokens.inc(model, "completion", amount=completion_tokens or 0)
+
+
+def _report_to_parent():
+    data = registry.dump()
+    if data:
+        sys.stderr.write(CHILD_PREFIX + json.dumps(data, separators=(",", ":")) + "\n")
+        sys.stderr.flush()
+
+
+if os.environ.get("METRICS_CHILD") == "1":
+    atexit.register(_report_to_parent)
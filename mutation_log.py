@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Append-only write-ahead log for graph mutations, with group commit.
+
+Walkers call ``append`` after changing the graph; it returns once the record
+is on disk. Grouping only happens inside one process. Appends that queue up
+while an fsync is in flight are written and fsync'd together, and
+``WAL_GROUP_COMMIT_MS`` (default 0) can hold a group open a little longer.
+Each request's walker is its own ``jac run`` process that appends once or
+twice, so a request still costs one fsync. Grouping pays off only for walkers
+that append many records in one process, and a non-zero window would only
+add latency to the rest.
+
+The log is a directory of segment files named by sequence number. Each record
+is ``length, crc32``, a marshal'd ``(op, args)`` tuple, then the length again;
+replay stops at the first torn or corrupt record. The trailing length lets a
+writer check the last record of the active segment before it appends, and a
+torn tail left by a crash is truncated then, so later records stay reachable.
+A position is ``(segment, offset)``:
+snapshots store the position they cover, recovery replays what follows it,
+and ``compact`` deletes the segments a snapshot has made redundant. Records
+hold absolute values (the resulting score, not the delta) so replaying one that
+the snapshot already contains is harmless. ``follow`` reads the same records
+incrementally, for a long-lived reader such as the server's learner feed.
+
+Appends take an exclusive lock on the directory for the write and fsync, so
+several Jac processes can share one log.
+"""
+import atexit
+import fcntl
+import logging
+import marshal
+import os
+import struct
+import threading
+import time
+import zlib
+
+log = logging.getLogger(__name__)
+
+RECORD = struct.Struct("<II")
+FOOTER = struct.Struct("<I")
+WAL_DIR = os.environ.get(
+    "WAL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "wal")
+)
+GROUP_COMMIT_MS = float(os.environ.get("WAL_GROUP_COMMIT_MS", "0"))
+
+
+class LogCompacted(Exception):
+    """The segments holding a reader's position were deleted by ``compact``."""
+
+
+def _segment_name(number):
+    return f"{number:08d}.log"
+
+
+class MutationLog:
+    def __init__(self, directory=WAL_DIR, group_commit_ms=GROUP_COMMIT_MS, max_group=4096):
+        self.directory = directory
+        self.window = group_commit_ms / 1000.0
+        self.max_group = max_group
+        self._cond = threading.Condition()
+        self._pending = []
+        self._queued = 0
+        self._durable = 0
+        self._error = None
+        self._closed = False
+        self._thread = None
+        self.groups = 0
+
+    def append(self, op, *args):
+        """Log one mutation and block until it is durable."""
+        payload = marshal.dumps((op, args))
+        record = RECORD.pack(len(payload), zlib.crc32(payload)) + payload + FOOTER.pack(len(payload))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("mutation log is closed")
+            self._ensure_writer()
+            self._pending.append(record)
+            self._queued += 1
+            ticket = self._queued
+            self._cond.notify_all()
+            while self._durable < ticket and self._error is None:
+                self._cond.wait()
+            if self._durable < ticket:
+                raise self._error
+
+    def position(self):
+        """(segment, offset) of the end of the log."""
+        with self._locked():
+            number = self._active_segment()
+            path = self._path(number)
+            return number, os.path.getsize(path) if os.path.exists(path) else 0
+
+    def rotate(self):
+        """Start a new segment and return its position, for a snapshot to record."""
+        with self._locked():
+            number = self._active_segment() + 1
+            open(self._path(number), "ab").close()
+            self._sync_directory()
+            return number, 0
+
+    def compact(self, position):
+        """Delete segments entirely before ``position``."""
+        removed = 0
+        with self._locked():
+            for number in self._segments():
+                if number < position[0]:
+                    os.unlink(self._path(number))
+                    removed += 1
+        return removed
+
+    def replay(self, position=(0, 0)):
+        """Yield ``(op, args)`` for every record after ``position``."""
+        segment, offset = position
+        for number in self._segments():
+            if number < segment:
+                continue
+            with open(self._path(number), "rb") as f:
+                data = f.read()
+            start = offset if number == segment else 0
+            for op, args, _ in _records(data, start):
+                yield op, args
+            end = _intact_end(data, start)
+            if end < len(data):
+                log.warning("mutation log: torn record in %s at %d", _segment_name(number), end)
+
+    def follow(self, position):
+        """Yield ``(op, args, position)`` for every record after ``position``.
+
+        Each position is the one just past its record, so a reader can resume
+        from the last one it saw. Only the unread part of each segment is read.
+        Raises LogCompacted if records after ``position`` may have been deleted.
+        """
+        segments = self._segments()
+        if segments and segments[0] > max(position[0], 1):
+            raise LogCompacted(f"{self.directory} starts at segment {segments[0]}, after {position}")
+        segment, offset = position
+        for number in segments:
+            if number < segment:
+                continue
+            start = offset if number == segment else 0
+            with open(self._path(number), "rb") as f:
+                f.seek(start)
+                data = f.read()
+            # A record still being written is picked up by the next call
+            for op, args, end in _records(data, 0):
+                yield op, args, (number, start + end)
+
+    def pending_after(self, position):
+        """True if anything was logged after ``position``."""
+        segments = [n for n in self._segments() if n >= position[0]]
+        return any(
+            os.path.getsize(self._path(n)) > (position[1] if n == position[0] else 0)
+            for n in segments
+        )
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="mutation-log", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            # Let the group fill for one window unless it is already full.
+            deadline = time.monotonic() + self.window
+            with self._cond:
+                while len(self._pending) < self.max_group and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                group, self._pending = self._pending, []
+                ticket = self._queued
+            try:
+                self._write(b"".join(group))
+            except OSError as e:
+                log.exception("mutation log write failed")
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = ticket
+                self.groups += 1
+                self._cond.notify_all()
+
+    def _write(self, data):
+        with self._locked():
+            path = self._path(self._active_segment())
+            created = not os.path.exists(path)
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size and not _tail_intact(fd, size):
+                    self._truncate_torn(fd, path)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            if created:
+                self._sync_directory()
+
+    def _truncate_torn(self, fd, path):
+        # A writer died mid-append; appending after its bytes would hide every later record
+        with open(path, "rb") as f:
+            data = f.read()
+        end = _intact_end(data, 0)
+        log.warning("mutation log: truncating torn tail of %s at %d (%d bytes)", os.path.basename(path), end, len(data) - end)
+        os.ftruncate(fd, end)
+
+    def _sync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return _DirectoryLock(os.path.join(self.directory, "LOCK"))
+
+    def _segments(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".log"))
+
+    def _active_segment(self):
+        segments = self._segments()
+        return segments[-1] if segments else 1
+
+    def _path(self, number):
+        return os.path.join(self.directory, _segment_name(number))
+
+
+def _records(data, offset):
+    """Yield ``(op, args, end)`` for each intact record in ``data`` from ``offset``."""
+    while offset + RECORD.size <= len(data):
+        length, crc = RECORD.unpack_from(data, offset)
+        end = offset + RECORD.size + length + FOOTER.size
+        if end > len(data):
+            return
+        payload = data[offset + RECORD.size:end - FOOTER.size]
+        if zlib.crc32(payload) != crc or FOOTER.unpack_from(data, end - FOOTER.size)[0] != length:
+            return
+        op, args = marshal.loads(payload)
+        yield op, args, end
+        offset = end
+
+
+def _intact_end(data, offset):
+    """Offset just past the last intact record from ``offset``."""
+    for _, _, end in _records(data, offset):
+        offset = end
+    return offset
+
+
+def _tail_intact(fd, size):
+    """True if the file ends with a whole record, found through its trailing length."""
+    if size < RECORD.size + FOOTER.size:
+        return False
+    length = FOOTER.unpack(os.pread(fd, FOOTER.size, size - FOOTER.size))[0]
+    start = size - FOOTER.size - length - RECORD.size
+    if start < 0:
+        return False
+    stored, crc = RECORD.unpack(os.pread(fd, RECORD.size, start))
+    return stored == length and zlib.crc32(os.pread(fd, length, start + RECORD.size)) == crc
+
+
+class _DirectoryLock:
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+mutation_log = MutationLog()
+atexit.register(mutation_log.close)
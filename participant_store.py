@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Compact paged storage for participants and their classroom sessions.
+
+A ``participant`` node plus its ``classroom_session`` edge costs two full
+archetypes with their anchors, and repeats strings like the role and join
+time per object. With ``PARTICIPANT_STORAGE=compact`` a classroom's sessions
+are stored instead as rows of ``session_page`` nodes hanging off the
+classroom, up to ``SESSION_PAGE_ROWS`` (default 1024) per page. A page holds
+one marshal'd ``rows`` field: the usernames, a small table of join time
+labels, and typed columns for the rest. The role is a one-byte enum, the
+booleans share one flags byte and timestamps are seconds since 2000.
+
+Pages are ordinary nodes, so the Jac session, graph snapshots and
+``restore_snapshot`` persist them like any other node. Joins and leaves are
+logged by username and replayed through the same seat/unseat path, and the
+session compactor archives expired rows in the same record shape as nodes.
+Walkers only decode the pages they touch; the functions below decode, change
+and write back one page. Readers handle both layouts, so a graph keeps its
+existing participant nodes when compact mode is turned on.
+"""
+import marshal
+import os
+import sys
+from array import array
+from datetime import datetime, timedelta
+
+COMPACT_SESSIONS = os.environ.get("PARTICIPANT_STORAGE", "").lower() == "compact"
+SESSION_PAGE_ROWS = int(os.environ.get("SESSION_PAGE_ROWS", "1024"))
+
+ROLES = ("student", "instructor", "moderator")
+MUTED = 1
+CAMERA_ON = 2
+HAND_RAISED = 4
+EPOCH = datetime(2000, 1, 1)
+
+
+def to_seconds(stamp):
+    """Seconds since 2000 of an ISO timestamp; 0 for an empty one."""
+    return int((datetime.fromisoformat(stamp) - EPOCH).total_seconds()) if stamp else 0
+
+
+def to_stamp(seconds):
+    return (EPOCH + timedelta(seconds=seconds)).isoformat(timespec="seconds") if seconds else ""
+
+
+class SessionRows:
+    """Decoded columns of one ``session_page``."""
+
+    __slots__ = ("usernames", "labels", "role", "flags", "join_time", "joined_at", "ended_at", "score")
+
+    def __init__(self, data=b""):
+        usernames, labels, role, flags, join_time, joined_at, ended_at, score = (
+            marshal.loads(data) if data else ([], [], b"", b"", b"", b"", b"", b"")
+        )
+        self.usernames = usernames
+        # Distinct join_time strings; most rows share "now" or a few clock times
+        self.labels = labels
+        self.role = array("B", role)
+        self.flags = array("B", flags)
+        self.join_time = array("H", join_time)
+        self.joined_at = array("I", joined_at)
+        # 0 while the session is live
+        self.ended_at = array("I", ended_at)
+        self.score = array("f", score)
+        if sys.byteorder == "big":
+            for column in self._wide():
+                column.byteswap()
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def encode(self):
+        wide = self._wide()
+        if sys.byteorder == "big":
+            wide = [array(column.typecode, column) for column in wide]
+            for column in wide:
+                column.byteswap()
+        join_time, joined_at, ended_at, score = (column.tobytes() for column in wide)
+        return marshal.dumps((
+            self.usernames, self.labels, self.role.tobytes(), self.flags.tobytes(),
+            join_time, joined_at, ended_at, score,
+        ))
+
+    def find(self, username):
+        try:
+            return self.usernames.index(username)
+        except ValueError:
+            return None
+
+    def seat(self, username, role, joined_at, is_muted=True, camera_on=False, hand_raised=False,
+             join_time="now", participation_score=0.0):
+        """Open a session for ``username``, reusing its row (and score) on a rejoin."""
+        row = self.find(username)
+        if row is None:
+            row = len(self.usernames)
+            self.usernames.append(username)
+            for column in (self.role, self.flags, self.join_time, self.joined_at, self.ended_at):
+                column.append(0)
+            self.score.append(participation_score)
+        self.role[row] = ROLES.index(role)
+        self.flags[row] = (MUTED if is_muted else 0) | (CAMERA_ON if camera_on else 0) | (HAND_RAISED if hand_raised else 0)
+        self.join_time[row] = self._label(join_time)
+        self.joined_at[row] = to_seconds(joined_at)
+        self.ended_at[row] = 0
+        return row
+
+    def live(self, row):
+        return not self.ended_at[row]
+
+    def participant(self, row):
+        """The row in the shape classroom listings use for a participant node."""
+        flags = self.flags[row]
+        return {
+            "username": self.usernames[row],
+            "role": ROLES[self.role[row]],
+            "is_muted": bool(flags & MUTED),
+            "camera_on": bool(flags & CAMERA_ON),
+            "hand_raised": bool(flags & HAND_RAISED),
+        }
+
+    def record(self, row):
+        """The row in the session archive's record shape, without the classroom."""
+        return {
+            "username": self.usernames[row],
+            "role": ROLES[self.role[row]],
+            "join_time": self.labels[self.join_time[row]],
+            "joined_at": to_stamp(self.joined_at[row]),
+            "ended_at": to_stamp(self.ended_at[row]),
+            "participation_score": self.score[row],
+        }
+
+    def expired(self, cutoff):
+        """Rows whose session ended before ``cutoff``."""
+        cutoff = to_seconds(cutoff)
+        return [row for row, ended in enumerate(self.ended_at) if ended and ended < cutoff]
+
+    def drop(self, rows):
+        """Remove ``rows``; the label table is rebuilt from what is left."""
+        drop = set(rows)
+        keep = [row for row in range(len(self.usernames)) if row not in drop]
+        labels = [self.labels[self.join_time[row]] for row in keep]
+        self.usernames = [self.usernames[row] for row in keep]
+        self.labels = []
+        for name in ("role", "flags", "joined_at", "ended_at", "score"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in keep)))
+        self.join_time = array("H", (self._label(label) for label in labels))
+
+    def _label(self, text):
+        try:
+            return self.labels.index(text)
+        except ValueError:
+            self.labels.append(text)
+            return len(self.labels) - 1
+
+    def _wide(self):
+        return [self.join_time, self.joined_at, self.ended_at, self.score]
+
+
+# The functions below take a session_page node (``rows`` and ``count`` fields)
+# and write the page back when they change it.
+
+def save(page, rows):
+    page.rows = rows.encode()
+    page.count = len(rows)
+
+
+def seat(page, username, role, joined_at, **fields):
+    rows = SessionRows(page.rows)
+    rows.seat(username, role, joined_at, **fields)
+    save(page, rows)
+
+
+def is_seated(page, username):
+    rows = SessionRows(page.rows)
+    row = rows.find(username)
+    return row is not None and rows.live(row)
+
+
+def unseat(page, username, ended_at):
+    """End a live session; returns its role, or "" if there was none."""
+    rows = SessionRows(page.rows)
+    row = rows.find(username)
+    if row is None or not rows.live(row):
+        return ""
+    rows.ended_at[row] = to_seconds(ended_at)
+    save(page, rows)
+    return ROLES[rows.role[row]]
+
+
+def usernames(page):
+    """Every username with a session on the page, live or ended."""
+    return SessionRows(page.rows).usernames
+
+
+def live_participants(data):
+    """Participants with a live session, from a page's ``rows`` field."""
+    rows = SessionRows(data)
+    return [rows.participant(row) for row in range(len(rows)) if rows.live(row)]
+
+
+def expired_records(page, cutoff):
+    rows = SessionRows(page.rows)
+    return [rows.record(row) for row in rows.expired(cutoff)]
+
+
+def drop_expired(page, cutoff):
+    """Remove sessions that ended before ``cutoff``; returns their usernames."""
+    rows = SessionRows(page.rows)
+    expired = rows.expired(cutoff)
+    if expired:
+        dropped = [rows.usernames[row] for row in expired]
+        rows.drop(expired)
+        save(page, rows)
+        return dropped
+    return []
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Materialized prerequisite DAG with incremental unlock tracking.
+
+The prerequisite edges are read once into a topological order. Each learner's
+unlocked/locked state is kept alongside it and only the topics downstream of a
+changed mastery edge are re-evaluated, so ``recommend`` is a lookup rather than
+a graph walk. Learner state is kept for the ``max_learners`` most recently
+seen learners with scores; learners with none are rendered without being kept.
+"""
+import threading
+from collections import OrderedDict, deque
+
+
+class PrerequisiteIndex:
+    def __init__(self, source=None, load=None, max_learners=100_000):
+        # source() returns {"topics": [(name, difficulty)], "edges": [(topic, prereq, required_score)]}.
+        # load(username) returns {topic: score} for a learner not seen yet.
+        self.source = source
+        self.load = load
+        self.max_learners = max_learners
+        self.order = []
+        self._lock = threading.RLock()
+        self._built = False
+        self._version = 0
+        self._difficulty = {}
+        self._prereqs = {}
+        self._dependents = {}
+        self._rank = {}
+        # username -> _LearnerState, least recently used first
+        self._learners = OrderedDict()
+
+    def configure(self, source=None, load=None):
+        with self._lock:
+            if source is not None:
+                self.source = source
+            if load is not None:
+                self.load = load
+            self.invalidate()
+
+    def invalidate(self):
+        """Drop the DAG and learner state; the next lookup rebuilds them."""
+        with self._lock:
+            self._built = False
+            self._learners.clear()
+            self._version += 1
+
+    def build(self, topics, edges):
+        difficulty = {name: level for name, level in topics}
+        prereqs = {name: [] for name in difficulty}
+        dependents = {name: [] for name in difficulty}
+        for topic, prereq, required in edges:
+            if topic not in difficulty or prereq not in difficulty:
+                continue
+            prereqs[topic].append((prereq, float(required)))
+            dependents[prereq].append(topic)
+
+        # Kahn's algorithm; ties keep catalog order so output is stable.
+        indegree = {name: len(prereqs[name]) for name in difficulty}
+        queue = deque(name for name in difficulty if indegree[name] == 0)
+        order = []
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for dependent in dependents[name]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+        if len(order) != len(difficulty):
+            cycle = sorted(name for name in difficulty if indegree[name] > 0)
+            raise ValueError(f"prerequisite cycle between topics: {', '.join(cycle)}")
+
+        with self._lock:
+            self.order = order
+            self._difficulty = difficulty
+            self._prereqs = prereqs
+            self._dependents = dependents
+            self._rank = {name: i for i, name in enumerate(order)}
+            self._learners.clear()
+            self._built = True
+            self._version += 1
+
+    def edges(self):
+        """All (topic, prereq, required_score) edges in topological order."""
+        with self._lock:
+            self._ensure_built()
+            return [(name, prereq, required) for name in self.order for prereq, required in self._prereqs[name]]
+
+    @property
+    def version(self):
+        return self._version
+
+    def recommend(self, username):
+        with self._lock:
+            state = self._learner(username)
+            if state.response is None:
+                state.response = self._render(username, state)
+            return state.response
+
+    def on_mastery(self, username, topic, score):
+        """Mastery listener: refresh only the topics downstream of ``topic``."""
+        with self._lock:
+            state = self._learners.get(username)
+            if state is None or topic not in self._rank:
+                return
+            state.scores[topic] = score
+            state.response = None
+            self._propagate(state, self._dependents[topic])
+
+    def _ensure_built(self):
+        if not self._built:
+            graph = self.source() if self.source is not None else {"topics": [], "edges": []}
+            self.build(graph["topics"], graph["edges"])
+
+    def _learner(self, username):
+        self._ensure_built()
+        state = self._learners.get(username)
+        if state is not None:
+            self._learners.move_to_end(username)
+            return state
+        scores = dict(self.load(username)) if self.load is not None else {}
+        state = _LearnerState(scores)
+        for name in self.order:
+            self._evaluate(state, name)
+        # Usernames come from request paths; ones with no scores are not kept
+        if scores:
+            self._learners[username] = state
+            if len(self._learners) > self.max_learners:
+                self._learners.popitem(last=False)
+        return state
+
+    def _evaluate(self, state, name):
+        missing = []
+        for prereq, required in self._prereqs[name]:
+            current = state.scores.get(prereq, 0.0)
+            if current < required or prereq in state.missing:
+                missing.append({"topic": prereq, "required": required, "current": current})
+        if missing:
+            state.missing[name] = missing
+        else:
+            state.missing.pop(name, None)
+
+    def _propagate(self, state, start):
+        # Visit dependents in topological order; stop where the status is unchanged.
+        pending = {name: self._rank[name] for name in start}
+        while pending:
+            name = min(pending, key=pending.get)
+            del pending[name]
+            was_locked = name in state.missing
+            self._evaluate(state, name)
+            if (name in state.missing) != was_locked:
+                for dependent in self._dependents[name]:
+                    pending[dependent] = self._rank[dependent]
+
+    def _render(self, username, state):
+        unlocked = []
+        locked = []
+        for name in self.order:
+            if name in state.missing:
+                locked.append({"name": name, "difficulty": self._difficulty[name], "missing_prereqs": state.missing[name]})
+            else:
+                unlocked.append({"name": name, "difficulty": self._difficulty[name], "current_score": state.scores.get(name, 0.0)})
+        return {"username": username, "unlocked": unlocked, "locked": locked}
+
+
+class _LearnerState:
+    __slots__ = ("scores", "missing", "response")
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.missing = {}
+        self.response = None
+
+
+prereq_index = PrerequisiteIndex()
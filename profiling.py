@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""On-demand sampling profiles of individual requests.
+
+``profiler.arm`` selects requests to profile. A rule matches a route (a
+template like ``/api/progress/{username}`` or any route), samples ``percent``
+of matching requests, and expires after ``requests`` profiles.
+``X-Profile: <PROFILE_TOKEN>`` profiles a single request when PROFILE_TOKEN is
+set. The same token, sent as ``X-Profile-Token``, is required to arm, list or
+disarm rules; without PROFILE_TOKEN those admin calls are refused. A rule
+covers at most ``MAX_PROFILE_REQUESTS`` requests.
+
+A selected request gets a ``Session``. A sampler thread reads the handler
+thread's stack every ``PROFILE_INTERVAL_MS`` and counts collapsed stacks.
+The result is written under ``PROFILE_DIR`` as
+``<time>-<route>[-<walkers>]-<id>.collapsed``, one ``frame;frame;frame count``
+line per stack, which flamegraph.pl and speedscope open directly. Walker
+subprocesses started during the request profile themselves the same way
+(``profile_child``) and write ``...-walker-<name>.collapsed`` next to it.
+
+With no rules armed, the cost is one attribute check in the middleware and
+one context variable lookup per handler and walker call.
+"""
+import atexit
+import contextvars
+import functools
+import hmac
+import inspect
+import itertools
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+MAX_PROFILE_REQUESTS = 100
+
+_current = contextvars.ContextVar("profile_session", default=None)
+_ids = itertools.count(1)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_")[:80] or "root"
+
+
+def write_collapsed(path, counts):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+            f.write(f"{';'.join(stack)} {count}\n")
+    os.replace(tmp, path)
+
+
+class Sampler:
+    """Counts the collapsed stacks of a set of threads until stopped."""
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.threads = set()
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if stack:
+                    key = tuple(reversed(stack))
+                    self.counts[key] = self.counts.get(key, 0) + 1
+                    self.samples += 1
+
+
+class Session:
+    def __init__(self, directory):
+        self.id = next(_ids)
+        self.started = time.strftime("%Y%m%d-%H%M%S")
+        self.directory = directory
+        self.walkers = []
+        self.sampler = Sampler().start()
+
+    def attach(self):
+        """Sample the calling thread (the one running the handler)."""
+        self.sampler.threads.add(threading.get_ident())
+
+    def detach(self):
+        self.sampler.threads.discard(threading.get_ident())
+
+    def child_prefix(self, walker):
+        self.walkers.append(walker)
+        return os.path.join(self.directory, f"{self.started}-{self.id}")
+
+    def finish(self, route):
+        """Stop sampling and write the profile; return its path (None if nothing was sampled)."""
+        counts = self.sampler.stop()
+        if not counts:
+            return None
+        tags = [self.started, _slug(route)]
+        if self.walkers:
+            tags.append(_slug("+".join(dict.fromkeys(self.walkers))))
+        path = os.path.join(self.directory, "-".join(tags) + f"-{self.id}.collapsed")
+        write_collapsed(path, counts)
+        return path
+
+
+class _Rule:
+    __slots__ = ("route", "pattern", "percent", "remaining")
+
+    def __init__(self, route, percent, requests):
+        self.route = route
+        self.pattern = re.compile(re.sub(r"\\\{[^/]*?\\\}", "[^/]+", re.escape(route)) + "$") if route else None
+        self.percent = percent
+        self.remaining = requests
+
+
+class Profiler:
+    def __init__(self, directory=PROFILE_DIR, token=PROFILE_TOKEN):
+        self.directory = directory
+        self.token = token
+        self._lock = threading.Lock()
+        self._rules = []
+        self.armed = False
+        self.written = []
+
+    def authorized(self, token):
+        """True if ``token`` matches PROFILE_TOKEN; always False when none is set."""
+        return bool(self.token) and hmac.compare_digest((token or "").encode(), self.token.encode())
+
+    def arm(self, requests=10, route=None, percent=100.0):
+        """Profile up to ``requests`` requests to ``route`` (any route if None), ``percent`` of them."""
+        if not 1 <= requests <= MAX_PROFILE_REQUESTS or not 0 < percent <= 100:
+            raise ValueError(f"requests must be in [1, {MAX_PROFILE_REQUESTS}] and percent in (0, 100]")
+        with self._lock:
+            self._rules.append(_Rule(route, percent, requests))
+            self.armed = True
+        return self.rules()
+
+    def disarm(self):
+        with self._lock:
+            self._rules.clear()
+            self.armed = False
+
+    def rules(self):
+        with self._lock:
+            return [{"route": r.route, "percent": r.percent, "remaining": r.remaining} for r in self._rules]
+
+    def start(self, path, header=None):
+        """Return a Session if this request should be profiled, else None."""
+        if not (self.token and header == self.token) and not self._take(path):
+            return None
+        return Session(self.directory)
+
+    def finish(self, session, route):
+        path = session.finish(route)
+        if path is not None:
+            with self._lock:
+                self.written = (self.written + [path])[-50:]
+        return path
+
+    def _take(self, path):
+        if not self.armed:
+            return False
+        with self._lock:
+            for rule in self._rules:
+                if rule.pattern is not None and not rule.pattern.match(path):
+                    continue
+                if random.random() * 100 >= rule.percent:
+                    continue
+                rule.remaining -= 1
+                if rule.remaining <= 0:
+                    self._rules.remove(rule)
+                    self.armed = bool(self._rules)
+                return True
+        return False
+
+
+def activate(session):
+    """Make ``session`` current for this request; returns a token for ``deactivate``."""
+    return _current.set(session)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def attach_thread(endpoint):
+    """Wrap a sync handler so a profiled request samples the worker thread running it."""
+    if inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        session = _current.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        session.attach()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            session.detach()
+
+    return run
+
+
+def child_env(walker):
+    """Environment additions that make a walker subprocess profile itself, or {}."""
+    session = _current.get()
+    if session is None:
+        return {}
+    return {"PROFILE_CHILD": session.child_prefix(walker), "PROFILE_WALKER": walker}
+
+
+def profile_child():
+    """In a walker process started with ``child_env``: sample the main thread until exit."""
+    prefix = os.environ.get("PROFILE_CHILD")
+    if not prefix:
+        return
+    sampler = Sampler()
+    sampler.threads.add(threading.main_thread().ident)
+    sampler.start()
+    path = f"{prefix}-walker-{_slug(os.environ.get('PROFILE_WALKER', 'walker'))}.collapsed"
+    atexit.register(lambda: write_collapsed(path, sampler.stop()))
+
+
+profiler = Profiler()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Bounded cache of serialized, precompressed response bodies.
+
+Bodies that only change with the catalog are serialized once per catalog
+version. The gzip encoding (and brotli, when the ``brotli`` package is
+installed) is stored next to the identity bytes. A request then only picks
+a variant by Accept-Encoding; no compression work happens per request.
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as is; compression would not pay for itself.
+MIN_COMPRESS_BYTES = 1024
+RESPONSE_CACHE_BYTES = int(os.environ.get("RESPONSE_CACHE_BYTES", str(32 * 2**20)))
+
+
+def negotiate(accept_encoding, available):
+    """Best of ``available`` (in server preference order) the client accepts."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    for coding in available:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+class EncodedBody:
+    __slots__ = ("variants", "nbytes")
+
+    def __init__(self, raw):
+        # coding -> bytes, in server preference order
+        self.variants = {}
+        if len(raw) >= MIN_COMPRESS_BYTES:
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(raw, quality=11)
+            self.variants["gzip"] = gzip.compress(raw, compresslevel=9, mtime=0)
+        self.variants["identity"] = raw
+        self.nbytes = sum(len(body) for body in self.variants.values())
+
+
+class ResponseCache:
+    """Size-bounded LRU of encoded bodies keyed by (kind, version, ...).
+
+    A key whose version differs from the newest one seen for its kind is
+    stale; those entries are dropped as soon as the new version shows up.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+        body = EncodedBody(build())
+        with self._lock:
+            kind, version = key[0], key[1]
+            if self._versions.get(kind) != version:
+                self._versions[kind] = version
+                for stale in [k for k in self._entries if k[0] == kind and k[1] != version]:
+                    self.nbytes -= self._entries.pop(stale).nbytes
+            if key not in self._entries and body.nbytes <= self.max_bytes:
+                self._entries[key] = body
+                self.nbytes += body.nbytes
+                while self.nbytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.nbytes = 0
+
+
+response_cache = ResponseCache()
@@ -1,14 +1,104 @@
 #!/usr/bin/env python3
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
 import uvicorn
 import subprocess
 import json
+import math
 import tempfile
 import os
+import re
+import fcntl
+import threading
+import time
 
-app = FastAPI()
+from admission import RATE_LIMIT_USER_HEADER, admission, request_user, route_class
+import metrics
+import profiling
+from profiling import attach_thread, profiler
+from catalog import CHAPTER_PAGE_SIZE, catalog, chapter_catalog, chapter_body, chapter_page
+from classroom_roster import ClassroomRegistry, replay_seats
+from cohort_analytics import cohort_analytics
+from graph_snapshot import SNAPSHOT_PATH, open_snapshot, classrooms as snapshot_classrooms
+from learner_feed import learner_feed
+from mutation_log import MutationLog, mutation_log
+from prereq_dag import prereq_index
+from shard_router import ShardRouter, merge_classrooms
+from http_cache import CATALOG_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, LIVE_CACHE_CONTROL, INSTANCE, FastJSONResponse, encoded_json, make_etag, raw_json
+from response_cache import response_cache
+from session_compactor import SESSION_COMPACT_INTERVAL
+
+# classroom_gate, admission, profiler and learner_feed are state of this process, so
+# the server runs as one; __main__ holds this lock so a second server stops at startup
+SERVER_LOCK = os.environ.get("SERVER_LOCK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.lock"))
+
+def hold_server_lock(path=SERVER_LOCK):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise SystemExit(f"{path} is held by another server process; run a single worker")
+    return fd
+
+app = FastAPI(default_response_class=FastJSONResponse)
+
+class ProfiledRoute(APIRoute):
+    # Sync handlers report their worker thread to the sampler when the request is profiled
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, attach_thread(endpoint), **kwargs)
+
+app.router.route_class = ProfiledRoute
+
+async def call_profiled(request: Request, call_next):
+    session = profiler.start(request.url.path, request.headers.get("x-profile"))
+    if session is None:
+        return await call_next(request)
+    token = profiling.activate(session)
+    try:
+        return await call_next(request)
+    finally:
+        profiling.deactivate(token)
+        route = request.scope.get("route")
+        profiler.finish(session, route.path if route is not None else request.url.path)
+
+# Registered before CORS so rejections still carry CORS headers
+@app.middleware("http")
+async def admit_request(request: Request, call_next):
+    cls = route_class(request.url.path)
+    # The client address; a user header only when one is configured as trusted
+    trusted = request.headers.get(RATE_LIMIT_USER_HEADER) if RATE_LIMIT_USER_HEADER else None
+    user = request_user(request.client.host if request.client else "", trusted)
+    status, retry_after = admission.admit(user, cls)
+    if status != 200:
+        error = "Too many requests" if status == 429 else "Server busy, try again shortly"
+        return FastJSONResponse({"error": error}, status_code=status, headers={"Retry-After": str(math.ceil(retry_after))})
+    try:
+        # Profiling shares this middleware rather than adding a layer; unarmed it is one check
+        if not profiler.armed and not profiler.token:
+            return await call_next(request)
+        return await call_profiled(request, call_next)
+    finally:
+        admission.release(user, cls)
+
+# Outermost of the two, so rejected requests are timed and counted as well
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates, not raw paths, keep the label set bounded
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.http_request_seconds.observe(time.perf_counter() - started, path, request.method)
+        metrics.http_requests.inc(path, str(status))
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +115,11 @@ class QuizRequest(BaseModel):
     topic_name: str
     difficulty: int = 2
 
+class EvaluateRequest(BaseModel):
+    username: str
+    topic_name: str
+    user_answer: str
+
 class JoinClassroomRequest(BaseModel):
     username: str
     classroom_name: str
@@ -33,6 +128,11 @@ class CompleteChapterRequest(BaseModel):
     username: str
     chapter_title: str
 
+class ProfileRequest(BaseModel):
+    requests: int = 10
+    route: str = ""
+    percent: float = 100.0
+
 @app.post("/api/execute")
 def execute_code(req: CodeRequest):
     import sys
@@ -41,6 +141,7 @@ def execute_code(req: CodeRequest):
             f.write(req.code)
             temp_path = f.name
         
+        metrics.subprocess_spawns.inc("jac_check")
         result = subprocess.run(
             [sys.executable, "-m", "jaclang", "check", temp_path],
             capture_output=True, text=True, timeout=5
@@ -63,344 +164,381 @@ def execute_code(req: CodeRequest):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# Return all topics including old names for compatibility
+TOPICS = {
+    "topics": [
+        {
+            "name": "Jac Basics",
+            "description": "Hello World, Nodes, Edges",
+            "difficulty": 1
+        },
+        {
+            "name": "Walkers",
+            "description": "Graph traversal and abilities",
+            "difficulty": 2
+        },
+        {
+            "name": "OSP Graphs",
+            "description": "Variables, control flow, functions",
+            "difficulty": 3
+        },
+        {
+            "name": "byLLM Agents",
+            "description": "Imports and testing",
+            "difficulty": 4
+        },
+        {
+            "name": "Jac Client",
+            "description": "Frontend integration",
+            "difficulty": 5
+        }
+    ]
+}
+TOPICS_ETAG = make_etag("topics", json.dumps(TOPICS, sort_keys=True))
+
 @app.get("/api/topics")
-def get_topics():
-    # Return all topics including old names for compatibility
-    return {
-        "topics": [
-            {
-                "name": "Jac Basics",
-                "description": "Hello World, Nodes, Edges",
-                "difficulty": 1
-            },
-            {
-                "name": "Walkers",
-                "description": "Graph traversal and abilities",
-                "difficulty": 2
-            },
-            {
-                "name": "OSP Graphs",
-                "description": "Variables, control flow, functions",
-                "difficulty": 3
-            },
-            {
-                "name": "byLLM Agents",
-                "description": "Imports and testing",
-                "difficulty": 4
-            },
-            {
-                "name": "Jac Client",
-                "description": "Frontend integration",
-                "difficulty": 5
-            }
-        ]
-    }
+def get_topics(request: Request):
+    return encoded_json(request, TOPICS_ETAG, ("topics", TOPICS_ETAG), lambda: TOPICS, CATALOG_CACHE_CONTROL)
+
+# Per-user walkers run on the shard that owns the username (GRAPH_SHARDS, default 1)
+shard_router = ShardRouter()
+
+def run_walker(walker, args=None, timeout=10, username=None, raw=False, serialize=False):
+    return shard_router.run(walker, args, username=username, timeout=timeout, raw=raw, serialize=serialize)
+
+def walker_response(result):
+    # Reports fetched with raw=True are sent as the walker printed them
+    return raw_json(result) if isinstance(result, bytes) else result
 
 @app.post("/api/quiz")
 def generate_quiz(req: QuizRequest):
     try:
-        result = subprocess.run(
-            ["jac", "run", "main.jac", "-w", "generate_quiz", "--args", f"topic_name={req.topic_name}"],
-            capture_output=True, text=True, timeout=30
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        result = run_walker("generate_quiz", {"topic_name": req.topic_name}, timeout=30, raw=True)
+        if result is not None:
+            return walker_response(result)
         return {"type": "error", "quiz": "Failed to generate quiz"}
     except Exception as e:
         return {"type": "error", "quiz": str(e)}
 
+@app.post("/api/evaluate")
+def evaluate_answer(req: EvaluateRequest):
+    try:
+        # The walker averages the new score into the stored one; one learner's answers take turns
+        result = run_walker("evaluate_answer", {"username": req.username, "topic_name": req.topic_name, "user_answer": req.user_answer},
+                            timeout=30, username=req.username, raw=True, serialize=True)
+        if result is not None:
+            return walker_response(result)
+        return {"error": "Failed to evaluate answer"}
+    except Exception as e:
+        return {"error": str(e)}
+
 @app.get("/api/progress/{username}")
 def get_progress(username: str):
     try:
-        result = subprocess.run(
-            ["jac", "run", "main.jac", "-w", "get_learner_progress", "--args", f"username={username}"],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        result = run_walker("get_learner_progress", {"username": username}, username=username, raw=True)
+        if result is not None:
+            return walker_response(result)
         return {"username": username, "progress": []}
     except:
         return {"username": username, "progress": []}
 
+
+@app.get("/api/dashboard/{username}")
+def get_dashboard(username: str):
+    try:
+        result = run_walker("get_dashboard_data", {"username": username}, username=username, raw=True)
+        if result is not None:
+            return walker_response(result)
+        return {"username": username, "study_streak": 0, "total_time": 0, "completed_chapters": 0, "total_chapters": 0, "enrolled_classrooms": []}
+    except:
+        return {"username": username, "study_streak": 0, "total_time": 0, "completed_chapters": 0, "total_chapters": 0, "enrolled_classrooms": []}
+
+def shard_log(n):
+    return MutationLog(shard_router.wal_dir(n)) if shard_router.shards > 1 else mutation_log
+
+# The matrices live here, loaded from every shard in the background and kept current from their logs
+learner_feed.configure(
+    export=lambda: shard_router.broadcast("export_learner_state", timeout=60),
+    logs=[shard_log(n) for n in range(shard_router.shards)],
+)
+cohort_analytics.configure(chapters=lambda topic_name: [ch["title"] for ch in chapter_catalog(topic_name)])
+
 @app.get("/api/recommend/{username}")
 def recommend_topics(username: str):
     try:
-        result = subprocess.run(
-            ["jac", "run", "main.jac", "-w", "recommend_next_topic", "--args", f"username={username}"],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
-        return {"username": username, "unlocked": [], "locked": []}
+        # Unlock state is kept per learner and updated from logged mastery writes
+        learner_feed.refresh()
+        return prereq_index.recommend(username)
     except:
         return {"username": username, "unlocked": [], "locked": []}
 
-@app.get("/api/dashboard/{username}")
-def get_dashboard(username: str):
+@app.get("/api/instructor/topics/{topic_name}")
+def get_topic_cohort(topic_name: str):
     try:
-        result = subprocess.run(
-            ["jac", "run", "main.jac", "-w", "get_dashboard_data", "--args", f"username={username}"],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
-        return {"username": username, "study_streak": 0, "total_time": 0, "completed_chapters": 0, "total_chapters": 0, "enrolled_classrooms": []}
+        learner_feed.refresh()
+        return cohort_analytics.topic_distribution(topic_name)
     except:
-        return {"username": username, "study_streak": 0, "total_time": 0, "completed_chapters": 0, "total_chapters": 0, "enrolled_classrooms": []}
+        return {"topic": topic_name, "learners": 0}
+
+@app.get("/api/instructor/chapters/{topic_name}")
+def get_chapter_funnel(topic_name: str):
+    try:
+        learner_feed.refresh()
+        return cohort_analytics.chapter_funnel(topic_name)
+    except:
+        return {"topic": topic_name, "funnel": []}
+
+@app.get("/api/instructor/stuck")
+def get_stuck_learners(topic_name: str = ""):
+    try:
+        learner_feed.refresh()
+        return cohort_analytics.stuck_learners(topic_name or None)
+    except:
+        return {"topic": topic_name, "prerequisites": []}
+
+# Opened in __main__ when every shard has a snapshot; the graph is then not re-seeded.
+# The classroom gate's first load reads them instead of waiting for replay_log.
+startup_snapshots = None
+
+def classroom_graph():
+    global startup_snapshots
+    # Classrooms are replicated on every shard; participants live on their owner's shard
+    if startup_snapshots is not None:
+        snapshots, startup_snapshots = startup_snapshots, None
+        # Joins and leaves logged after each snapshot (e.g. before a crash) are not in it
+        return merge_classrooms(
+            replay_seats(snapshot_classrooms(snapshot), shard_log(n).replay(snapshot.position))
+            for n, snapshot in enumerate(snapshots)
+        )
+    # Later reloads read the live graph; a newer snapshot may have compacted those records
+    results = shard_router.broadcast("get_virtual_classrooms")
+    # A missing shard would leave its students out and let the gate admit past capacity
+    failed = [n for n, result in enumerate(results) if not result]
+    if failed:
+        raise RuntimeError(f"get_virtual_classrooms failed on shards {failed}")
+    return merge_classrooms(result["virtual_classrooms"] for result in results)
+
+# Seats are admitted here, in one process, so concurrent joins cannot overshoot capacity
+classroom_gate = ClassroomRegistry(source=classroom_graph)
 
 @app.get("/api/classrooms")
-def get_classrooms():
-    return {
-        "classrooms": [
-            {
-                "name": "Jac Basics Virtual Lab",
-                "instructor": "Dr. Sarah Chen",
-                "capacity": 30,
-                "active_students": 15,
-                "available_spots": 15,
-                "meeting_url": "https://meet.jaseci.org/jac-basics",
-                "is_live": True,
-                "whiteboard_content": "Today: Hello World & Node Creation",
-                "chat_enabled": True,
-                "recording_enabled": True,
-                "breakout_rooms": 3,
-                "screen_sharing": True,
-                "current_presenter": "Dr. Sarah Chen",
-                "participants": [
-                    {"username": "Alice", "role": "student", "is_muted": False, "camera_on": True, "hand_raised": False},
-                    {"username": "Bob", "role": "student", "is_muted": True, "camera_on": False, "hand_raised": True}
-                ]
-            },
-            {
-                "name": "Advanced Jac Workshop",
-                "instructor": "Prof. Michael Rodriguez",
-                "capacity": 25,
-                "active_students": 8,
-                "available_spots": 17,
-                "meeting_url": "https://meet.jaseci.org/advanced-jac",
-                "is_live": False,
-                "whiteboard_content": "Next Session: Walker Patterns",
-                "chat_enabled": True,
-                "recording_enabled": True,
-                "breakout_rooms": 2,
-                "screen_sharing": False,
-                "current_presenter": "",
-                "participants": [
-                    {"username": "David", "role": "student", "is_muted": False, "camera_on": True, "hand_raised": False}
-                ]
-            }
-        ]
-    }
+def get_classrooms(request: Request):
+    # Read the version first: a change racing the listing only makes the ETag older
+    version = classroom_gate.version
+    etag = make_etag("classrooms", INSTANCE, version)
+    try:
+        # Encoded once per registry version; polling clients share the bytes
+        return encoded_json(request, etag, ("classrooms", version), lambda: {"classrooms": classroom_gate.listing()}, LIVE_CACHE_CONTROL)
+    except:
+        classroom_gate.configure()
+        return {"classrooms": []}
 
 @app.get("/api/schedule")
 def get_schedule():
     try:
-        result = subprocess.run(
-            ["jac", "run", "main.jac", "-w", "get_schedule"],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        result = run_walker("get_schedule", raw=True)
+        if result is not None:
+            return walker_response(result)
         return {"events": []}
     except:
         return {"events": []}
 
+@app.post("/api/admin/snapshot")
+def save_snapshot():
+    results = shard_router.broadcast("save_snapshot", timeout=60, exclusive=True)
+    if None in results:
+        return {"error": "Snapshot failed", "shards": results}
+    return results[0] if len(results) == 1 else {"shards": results}
+
+def profile_forbidden(request: Request):
+    # Profiles expose stacks and file paths; without PROFILE_TOKEN the admin calls are off
+    if profiler.authorized(request.headers.get("x-profile-token")):
+        return None
+    return FastJSONResponse({"error": "X-Profile-Token must match PROFILE_TOKEN"}, status_code=403)
+
+@app.post("/api/admin/profile")
+def arm_profiler(req: ProfileRequest, request: Request):
+    forbidden = profile_forbidden(request)
+    if forbidden is not None:
+        return forbidden
+    try:
+        rules = profiler.arm(req.requests, req.route or None, req.percent)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"rules": rules, "directory": profiler.directory}
+
+@app.get("/api/admin/profile")
+def profiler_status(request: Request):
+    forbidden = profile_forbidden(request)
+    if forbidden is not None:
+        return forbidden
+    return {"rules": profiler.rules(), "profiles": profiler.written, "directory": profiler.directory}
+
+@app.delete("/api/admin/profile")
+def disarm_profiler(request: Request):
+    forbidden = profile_forbidden(request)
+    if forbidden is not None:
+        return forbidden
+    profiler.disarm()
+    return {"rules": []}
+
+def compact_sessions_periodically(interval=SESSION_COMPACT_INTERVAL):
+    # Walker processes are one-shot, so the retention sweep is driven from here
+    while True:
+        time.sleep(interval)
+        if None in shard_router.broadcast("compact_sessions", timeout=300):
+            print("Session compaction error: not every shard was compacted")
+
+@app.on_event("shutdown")
+def snapshot_on_shutdown():
+    if None in shard_router.broadcast("save_snapshot", timeout=60, exclusive=True):
+        print("Snapshot error: not every shard was saved")
+
+def hit_ratio(hits, misses):
+    return hits / (hits + misses) if hits + misses else 0.0
+
+metrics.Gauge(metrics.registry, "response_cache_hits", "Encoded response cache hits.", read=lambda: response_cache.hits)
+metrics.Gauge(metrics.registry, "response_cache_misses", "Encoded response cache misses.", read=lambda: response_cache.misses)
+metrics.Gauge(metrics.registry, "response_cache_hit_ratio", "Encoded response cache hit ratio.", read=lambda: hit_ratio(response_cache.hits, response_cache.misses))
+metrics.Gauge(metrics.registry, "response_cache_bytes", "Bytes held by the encoded response cache.", read=lambda: response_cache.nbytes)
+metrics.Gauge(metrics.registry, "requests_in_flight", "Costed (walker, quiz, execute) requests in flight.", read=lambda: admission.in_flight)
+metrics.Gauge(metrics.registry, "walker_queue_depth", "Walker calls waiting for a shard slot.", ("shard",),
+              read=lambda: {(str(n),): depth for n, depth in enumerate(shard_router.waiting)})
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/test")
 def test_endpoint():
     return {"status": "working", "message": "Server is running"}
 
+def seat_from_waitlist(classroom_name, usernames):
+    # Students the gate seated from the waitlist still need their participant nodes
+    for next_username in usernames:
+        try:
+            run_walker("join_virtual_classroom", {"username": next_username, "classroom_name": classroom_name}, username=next_username)
+        except:
+            pass
+
 @app.post("/api/join-classroom")
 def join_classroom(req: dict):
     username = req.get('username', 'Student')
     classroom_name = req.get('classroom_name', 'Unknown')
-    return {
-        "success": True,
-        "message": f"{username} joined {classroom_name}",
-        "meeting_url": "https://meet.jaseci.org/jac-basics",
-        "is_live": True
-    }
-
-@app.get("/api/chapters/{topic_name}")
-def get_chapters(topic_name: str):
-    # Return new Jaseci documentation tour structure
-    if topic_name == "Jac Basics":
-        return {
-            "topic": "Jac Basics",
-            "chapters": [
-                {
-                    "title": "Hello World",
-                    "content": "# Hello World\n\nLet's start with the classic Hello World program in Jac.\n\n```jac\nwalker init {\n    can run {\n        print(\"Hello World!\");\n    }\n}\n```\n\nTo run this program:\n1. Save it as hello.jac\n2. Run: jac run hello.jac\n\nThe walker init is the entry point of your Jac program.",
-                    "order": 1
-                },
-                {
-                    "title": "Nodes",
-                    "content": "# Nodes\n\nNodes are the fundamental building blocks in Jac.\n\n## Creating Nodes\n```jac\nnode person {\n    has name: str;\n    has age: int;\n}\n\nwalker init {\n    can run {\n        p = spawn here ++> person(name=\"Alice\", age=25);\n        print(f\"Created person: {p.name}, age {p.age}\");\n    }\n}\n```\n\n## Node Properties\n- Nodes can have properties defined with 'has'\n- Properties can have default values\n- Nodes are spawned using the 'spawn' keyword",
-                    "order": 2
-                },
-                {
-                    "title": "Edges",
-                    "content": "# Edges\n\nEdges represent relationships between nodes.\n\n## Creating Edges\n```jac\nedge friendship {\n    has strength: float = 1.0;\n    has since: str;\n}\n\nnode person {\n    has name: str;\n}\n\nwalker init {\n    can run {\n        alice = spawn here ++> person(name=\"Alice\");\n        bob = spawn here ++> person(name=\"Bob\");\n        alice ++> friendship(strength=0.8, since=\"2020\") ++> bob;\n    }\n}\n```\n\n## Edge Directions\n- ++> creates a directed edge\n- <--> creates a bidirectional edge",
-                    "order": 3
-                }
-            ]
-        }
-    elif topic_name == "Walkers":
-        return {
-            "topic": "Walkers",
-            "chapters": [
-                {
-                    "title": "Walkers",
-                    "content": "# Walkers\n\nWalkers are active components that traverse graphs.\n\n## Basic Walker\n```jac\nnode person {\n    has name: str;\n}\n\nwalker greet {\n    can speak with person entry {\n        print(f\"Hello {here.name}!\");\n    }\n}\n```\n\n## Walker Abilities\n- Walkers have 'abilities' defined with 'can'\n- 'entry' ability executes when walker visits a node\n- Abilities can be specific to node types",
-                    "order": 1
-                },
-                {
-                    "title": "Graph Traversal",
-                    "content": "# Graph Traversal\n\nWalkers can traverse graphs using various patterns.\n\n## Basic Traversal\n```jac\nnode person { has name: str; }\nedge friendship { has years: int; }\n\nwalker find_friends {\n    can explore with person entry {\n        for friend in here --> friendship --> person {\n            print(f\"Friend: {friend.name}\");\n        }\n    }\n}\n```\n\n## Filtered Traversal\n```jac\nwalker find_close_friends {\n    can explore with person entry {\n        close_friends = here --> friendship[years >= 5] --> person;\n    }\n}\n```",
-                    "order": 2
-                },
-                {
-                    "title": "Abilities",
-                    "content": "# Abilities\n\nAbilities define what walkers can do with different node types.\n\n## Node-Specific Abilities\n```jac\nnode person { has name: str; }\nnode place { has name: str; }\n\nwalker greeter {\n    can greet_person with person entry {\n        print(f\"Hello {here.name}!\");\n    }\n    \n    can visit_place with place entry {\n        print(f\"Visiting {here.name}\");\n    }\n}\n```\n\n## Entry and Exit Abilities\n- entry: Executes when walker starts\n- exit: Executes when walker finishes",
-                    "order": 3
-                }
-            ]
-        }
-    elif topic_name == "Advanced Jac":
-        return {
-            "topic": "Advanced Jac",
-            "chapters": [
-                {
-                    "title": "Variables and Data Types",
-                    "content": "# Variables and Data Types\n\nJac supports various data types.\n\n## Basic Data Types\n```jac\nwalker data_demo {\n    can run {\n        name: str = \"Alice\";\n        age: int = 25;\n        height: float = 5.6;\n        is_student: bool = true;\n    }\n}\n```\n\n## Collections\n```jac\nnumbers: list = [1, 2, 3, 4, 5];\nperson: dict = {\"name\": \"Bob\", \"age\": 30};\n```",
-                    "order": 1
-                },
-                {
-                    "title": "Control Flow",
-                    "content": "# Control Flow\n\nJac provides standard control flow constructs.\n\n## Conditional Statements\n```jac\nwalker age_checker {\n    can check with person entry {\n        if (here.age >= 18) {\n            print(f\"{here.name} is an adult\");\n        } elif (here.age >= 13) {\n            print(f\"{here.name} is a teenager\");\n        } else {\n            print(f\"{here.name} is a child\");\n        }\n    }\n}\n```\n\n## Loops\n```jac\nfor i in range(5) {\n    print(f\"Count: {i}\");\n}\n```",
-                    "order": 2
-                },
-                {
-                    "title": "Functions and Methods",
-                    "content": "# Functions and Methods\n\nJac supports functions for code reusability.\n\n## Basic Functions\n```jac\ncan add_numbers(a: int, b: int) -> int {\n    return a + b;\n}\n\nwalker math_demo {\n    can run {\n        result = add_numbers(5, 3);\n        print(f\"5 + 3 = {result}\");\n    }\n}\n```\n\n## Walker Methods\n```jac\nwalker calculator {\n    has total: float = 0.0;\n    \n    can add(value: float) {\n        total += value;\n    }\n}\n```",
-                    "order": 3
-                }
-            ]
-        }
-    elif topic_name == "Modules & Testing":
-        return {
-            "topic": "Modules & Testing",
-            "chapters": [
-                {
-                    "title": "Imports and Modules",
-                    "content": "# Imports and Modules\n\nJac supports importing functionality from other modules.\n\n## Standard Library Imports\n```jac\nimport:py from datetime { datetime };\nimport:py from random { randint };\n\nwalker time_demo {\n    can run {\n        now = datetime.now();\n        random_num = randint(1, 100);\n    }\n}\n```\n\n## Jac Module Imports\n```jac\nimport { format_name } from \"utils.jac\";\n```",
-                    "order": 1
-                },
-                {
-                    "title": "Error Handling",
-                    "content": "# Error Handling\n\nJac provides mechanisms to handle errors gracefully.\n\n## Try-Catch Blocks\n```jac\nwalker safe_division {\n    can divide(a: float, b: float) -> float {\n        try {\n            result = a / b;\n            return result;\n        } except ZeroDivisionError {\n            print(\"Error: Cannot divide by zero\");\n            return 0.0;\n        }\n    }\n}\n```\n\n## Validation\n- Check input parameters\n- Validate data before processing",
-                    "order": 2
-                },
-                {
-                    "title": "Testing",
-                    "content": "# Testing\n\nTesting is crucial for ensuring your Jac programs work correctly.\n\n## Basic Testing\n```jac\ncan add(a: int, b: int) -> int {\n    return a + b;\n}\n\ncan test_add() {\n    result = add(2, 3);\n    assert result == 5, f\"Expected 5, got {result}\";\n    print(\"test_add passed\");\n}\n```\n\n## Testing Walkers\n```jac\nwalker test_increment {\n    can run {\n        c = spawn here ++> counter(value=5);\n        spawn c walker increment_walker();\n        assert c.value == 6;\n    }\n}\n```",
-                    "order": 3
-                }
-            ]
-        }
-    # Support old topic names for backward compatibility
-    elif topic_name == "OSP Graphs":
-        return {
-            "topic": "OSP Graphs",
-            "chapters": [
-                {
-                    "title": "Variables and Data Types",
-                    "content": "# Variables and Data Types\n\nJac supports various data types.\n\n## Basic Data Types\n```jac\nwalker data_demo {\n    can run {\n        name: str = \"Alice\";\n        age: int = 25;\n        height: float = 5.6;\n        is_student: bool = true;\n    }\n}\n```\n\n## Collections\n```jac\nnumbers: list = [1, 2, 3, 4, 5];\nperson: dict = {\"name\": \"Bob\", \"age\": 30};\n```",
-                    "order": 1
-                },
-                {
-                    "title": "Control Flow",
-                    "content": "# Control Flow\n\nJac provides standard control flow constructs.\n\n## Conditional Statements\n```jac\nwalker age_checker {\n    can check with person entry {\n        if (here.age >= 18) {\n            print(f\"{here.name} is an adult\");\n        } elif (here.age >= 13) {\n            print(f\"{here.name} is a teenager\");\n        } else {\n            print(f\"{here.name} is a child\");\n        }\n    }\n}\n```\n\n## Loops\n```jac\nfor i in range(5) {\n    print(f\"Count: {i}\");\n}\n```",
-                    "order": 2
-                },
-                {
-                    "title": "Functions and Methods",
-                    "content": "# Functions and Methods\n\nJac supports functions for code reusability.\n\n## Basic Functions\n```jac\ncan add_numbers(a: int, b: int) -> int {\n    return a + b;\n}\n\nwalker math_demo {\n    can run {\n        result = add_numbers(5, 3);\n        print(f\"5 + 3 = {result}\");\n    }\n}\n```\n\n## Walker Methods\n```jac\nwalker calculator {\n    has total: float = 0.0;\n    \n    can add(value: float) {\n        total += value;\n    }\n}\n```",
-                    "order": 3
-                }
-            ]
-        }
-    elif topic_name == "byLLM Agents":
-        return {
-            "topic": "byLLM Agents",
-            "chapters": [
-                {
-                    "title": "Imports and Modules",
-                    "content": "# Imports and Modules\n\nJac supports importing functionality from other modules.\n\n## Standard Library Imports\n```jac\nimport:py from datetime { datetime };\nimport:py from random { randint };\n\nwalker time_demo {\n    can run {\n        now = datetime.now();\n        random_num = randint(1, 100);\n    }\n}\n```\n\n## Jac Module Imports\n```jac\nimport { format_name } from \"utils.jac\";\n```",
-                    "order": 1
-                },
-                {
-                    "title": "Error Handling",
-                    "content": "# Error Handling\n\nJac provides mechanisms to handle errors gracefully.\n\n## Try-Catch Blocks\n```jac\nwalker safe_division {\n    can divide(a: float, b: float) -> float {\n        try {\n            result = a / b;\n            return result;\n        } except ZeroDivisionError {\n            print(\"Error: Cannot divide by zero\");\n            return 0.0;\n        }\n    }\n}\n```\n\n## Validation\n- Check input parameters\n- Validate data before processing",
-                    "order": 2
-                },
-                {
-                    "title": "Testing",
-                    "content": "# Testing\n\nTesting is crucial for ensuring your Jac programs work correctly.\n\n## Basic Testing\n```jac\ncan add(a: int, b: int) -> int {\n    return a + b;\n}\n\ncan test_add() {\n    result = add(2, 3);\n    assert result == 5, f\"Expected 5, got {result}\";\n    print(\"test_add passed\");\n}\n```\n\n## Testing Walkers\n```jac\nwalker test_increment {\n    can run {\n        c = spawn here ++> counter(value=5);\n        spawn c walker increment_walker();\n        assert c.value == 6;\n    }\n}\n```",
-                    "order": 3
-                }
-            ]
-        }
-    elif topic_name == "Jac Client":
+    try:
+        admission = classroom_gate.admit(classroom_name, username)
+    except KeyError:
+        return {"success": False, "error": "Classroom not found"}
+    except RuntimeError:
+        return {"success": False, "error": "Classrooms are unavailable, try again shortly"}
+    if admission["status"] == "waitlisted":
         return {
-            "topic": "Jac Client",
-            "chapters": [
-                {
-                    "title": "Imports and Modules",
-                    "content": "# Imports and Modules\n\nJac supports importing functionality from other modules.\n\n## Standard Library Imports\n```jac\nimport:py from datetime { datetime };\nimport:py from random { randint };\n\nwalker time_demo {\n    can run {\n        now = datetime.now();\n        random_num = randint(1, 100);\n    }\n}\n```\n\n## Jac Module Imports\n```jac\nimport { format_name } from \"utils.jac\";\n```",
-                    "order": 1
-                },
-                {
-                    "title": "Error Handling",
-                    "content": "# Error Handling\n\nJac provides mechanisms to handle errors gracefully.\n\n## Try-Catch Blocks\n```jac\nwalker safe_division {\n    can divide(a: float, b: float) -> float {\n        try {\n            result = a / b;\n            return result;\n        } except ZeroDivisionError {\n            print(\"Error: Cannot divide by zero\");\n            return 0.0;\n        }\n    }\n}\n```\n\n## Validation\n- Check input parameters\n- Validate data before processing",
-                    "order": 2
-                },
-                {
-                    "title": "Testing",
-                    "content": "# Testing\n\nTesting is crucial for ensuring your Jac programs work correctly.\n\n## Basic Testing\n```jac\ncan add(a: int, b: int) -> int {\n    return a + b;\n}\n\ncan test_add() {\n    result = add(2, 3);\n    assert result == 5, f\"Expected 5, got {result}\";\n    print(\"test_add passed\");\n}\n```\n\n## Testing Walkers\n```jac\nwalker test_increment {\n    can run {\n        c = spawn here ++> counter(value=5);\n        spawn c walker increment_walker();\n        assert c.value == 6;\n    }\n}\n```",
-                    "order": 3
-                }
-            ]
+            "success": False,
+            "waitlisted": True,
+            "position": admission["position"],
+            "message": f"{classroom_name} is full; you are #{admission['position']} on the waitlist"
         }
-    else:
-        return {"topic": topic_name, "chapters": []}
+    try:
+        result = run_walker("join_virtual_classroom", {"username": username, "classroom_name": classroom_name}, username=username)
+        if result and result.get("success"):
+            return result
+    except:
+        pass
+    if admission["status"] == "admitted":
+        # Giving the seat back can seat the next student on the waitlist
+        seat_from_waitlist(classroom_name, classroom_gate.leave(classroom_name, username)["admitted"])
+    return {"success": False, "error": f"Could not join {classroom_name}"}
+
+@app.post("/api/leave-classroom")
+def leave_classroom(req: dict):
+    username = req.get('username', 'Student')
+    classroom_name = req.get('classroom_name', 'Unknown')
+    try:
+        departure = classroom_gate.leave(classroom_name, username)
+    except KeyError:
+        return {"success": False, "error": "Classroom not found"}
+    except RuntimeError:
+        return {"success": False, "error": "Classrooms are unavailable, try again shortly"}
+    try:
+        run_walker("leave_virtual_classroom", {"username": username, "classroom_name": classroom_name}, username=username)
+    except:
+        pass
+    seat_from_waitlist(classroom_name, departure["admitted"])
+    return {"success": departure["left"], "message": f"{username} left {classroom_name}", "admitted": departure["admitted"]}
+
+@app.get("/api/chapters/{topic_name}")
+def get_chapters(topic_name: str, request: Request, cursor: str = "", limit: int = CHAPTER_PAGE_SIZE):
+    # Metadata only; bodies come from /api/chapter-content/{hash} as a chapter is opened
+    def build():
+        # Old topic names resolve to the topic whose chapters they share
+        chapters, next_cursor = chapter_page(chapter_catalog(topic_name), cursor, limit)
+        return {"topic": topic_name, "chapters": chapters, "next_cursor": next_cursor}
+    # Serialized and compressed once per catalog version, then served from memory
+    version = catalog.version
+    etag = make_etag("chapters", version, topic_name, cursor, limit)
+    try:
+        return encoded_json(request, etag, ("chapters", version, topic_name, cursor, limit), build, CATALOG_CACHE_CONTROL)
+    except ValueError:
+        return {"topic": topic_name, "chapters": [], "next_cursor": None, "error": "Invalid cursor"}
+
+CHAPTER_HASH = re.compile(r"[0-9a-f]{64}")
+
+@app.get("/api/chapter-content/{digest}")
+def get_chapter_content(digest: str, request: Request):
+    # Keyed by content hash, so a body is cached for good and shared by every topic using it
+    if not CHAPTER_HASH.fullmatch(digest):
+        return {"hash": digest, "error": "Chapter not found"}
+    try:
+        return encoded_json(
+            request, make_etag("chapter", digest), ("chapter-content", None, digest),
+            lambda: {"hash": digest, "content": chapter_body(digest)}, IMMUTABLE_CACHE_CONTROL,
+        )
+    except KeyError:
+        return {"hash": digest, "error": "Chapter not found"}
 
 @app.post("/api/complete-chapter")
 def complete_chapter(req: dict):
     username = req.get('username', 'Doris')
     chapter_title = req.get('chapter_title', 'Unknown Chapter')
-    
-    return {
-        "success": True, 
-        "message": f"Chapter '{chapter_title}' completed!",
-        "username": username,
-        "chapter_title": chapter_title
-    }
+    try:
+        # Recorded on the learner's shard and logged, so the chapter funnel sees it
+        result = run_walker("complete_chapter", {"username": username, "chapter_title": chapter_title}, username=username, raw=True)
+        if result is not None:
+            return walker_response(result)
+    except:
+        pass
+    return {"success": False, "error": f"Could not complete '{chapter_title}'", "username": username, "chapter_title": chapter_title}
 
 if __name__ == "__main__":
-    # Initialize data on startup
-    print("Initializing data...")
-    try:
-        result = subprocess.run(
-            ["jac", "run", "main.jac", "-w", "init"],
-            capture_output=True, text=True, timeout=30
-        )
-        if result.returncode == 0:
+    server_lock = hold_server_lock()
+
+    # Snapshots mean the shards were seeded before; mapping them is all startup needs
+    shards = range(shard_router.shards)
+    snapshots = [open_snapshot(shard_router.snapshot_path(n) or SNAPSHOT_PATH) for n in shards]
+    if None not in snapshots:
+        startup_snapshots = snapshots
+        print(f"Graph snapshot: {sum(s.node_count for s in snapshots)} nodes, {sum(s.edge_count for s in snapshots)} edges")
+        # Writes logged after the snapshot (e.g. before a crash) are replayed off the startup path
+        for n, snapshot in zip(shards, snapshots):
+            if shard_log(n).pending_after(snapshot.position):
+                print(f"Replaying mutation log of shard {n} in the background...")
+                threading.Thread(target=shard_router.run, args=("replay_log",), kwargs={"shard": n, "timeout": 300}, daemon=True).start()
+    else:
+        # Initialize data on startup
+        print("Initializing data...")
+        results = shard_router.broadcast("init", timeout=30, parse=False)
+        if None not in results:
             print("Data initialized successfully")
+            shard_router.broadcast("save_snapshot", timeout=60, exclusive=True)
         else:
-            print(f"Init warning: {result.stderr}")
-    except Exception as e:
-        print(f"Init error: {e}")
+            print("Init warning: not every shard was initialized")
     
+    # Loaded off the request path; requests are served from what is loaded meanwhile
+    learner_feed.start()
+
+    if SESSION_COMPACT_INTERVAL > 0:
+        threading.Thread(target=compact_sessions_periodically, name="session-compactor", daemon=True).start()
+
     print("Server: http://localhost:8000")
     print("Frontend: http://localhost:3000")
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Participant lookup by (username, classroom) and archival of ended sessions.
+
+``session_index`` maps each (username, classroom) pair to its participant node,
+so a rejoin reopens the existing session instead of spawning another
+participant. Leaving only stamps ``ended_at`` on the session. A classroom's
+sessions are loaded the first time the walker process touches that
+classroom, so a join reads one classroom rather than every session in the
+graph.
+
+``session_compactor`` hands sessions that ended more than
+``SESSION_RETENTION_HOURS`` ago to the graph's sweep function. The sweep
+writes them to gzip'd JSONL files under ``archive/`` and only then deletes
+them, which keeps each classroom's session list to live and recent
+participants. Walker processes are one-shot, so the server runs the
+``compact_sessions`` walker every ``SESSION_COMPACT_INTERVAL`` seconds.
+"""
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+SESSION_RETENTION_HOURS = float(os.environ.get("SESSION_RETENTION_HOURS", "24"))
+SESSION_COMPACT_INTERVAL = float(os.environ.get("SESSION_COMPACT_INTERVAL", "300"))
+
+
+def now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class SessionIndex:
+    def __init__(self, source=None):
+        # source(classroom_name) returns [(username, participant)] for that classroom's sessions.
+        self.source = source
+        self._lock = threading.Lock()
+        self._classrooms = {}
+
+    def configure(self, source=None):
+        with self._lock:
+            if source is not None:
+                self.source = source
+            self._classrooms.clear()
+
+    def get(self, username, classroom_name):
+        with self._lock:
+            return self._classroom(classroom_name).get(username)
+
+    def put(self, username, classroom_name, participant):
+        with self._lock:
+            self._classroom(classroom_name)[username] = participant
+
+    def discard(self, username, classroom_name, participant=None):
+        """Drop the entry, only if it still points at ``participant`` when given."""
+        with self._lock:
+            # A classroom that was never loaded will be read fresh from the graph
+            participants = self._classrooms.get(classroom_name)
+            if participants is None:
+                return
+            current = participants.get(username)
+            if current is not None and (participant is None or current is participant):
+                del participants[username]
+
+    def _classroom(self, classroom_name):
+        participants = self._classrooms.get(classroom_name)
+        if participants is None:
+            participants = self._classrooms[classroom_name] = dict(
+                self.source(classroom_name) if self.source is not None else []
+            )
+        return participants
+
+
+class SessionCompactor:
+    def __init__(self, sweep=None, retention_hours=SESSION_RETENTION_HOURS, archive_dir=ARCHIVE_DIR):
+        # sweep(cutoff, archive) passes sessions that ended before ``cutoff`` to
+        # archive(records), then deletes them; it returns how many it removed.
+        self.sweep = sweep
+        self.retention = timedelta(hours=retention_hours)
+        self.archive_dir = archive_dir
+        self._lock = threading.Lock()
+        self.archived = 0
+
+    def configure(self, sweep=None):
+        if sweep is not None:
+            self.sweep = sweep
+
+    def compact(self, cutoff=None):
+        """Archive and remove sessions ended before ``cutoff`` (default: the retention window)."""
+        if self.sweep is None:
+            return 0
+        cutoff = cutoff or (datetime.now() - self.retention).isoformat(timespec="seconds")
+        with self._lock:
+            removed = self.sweep(cutoff, self.archive)
+            self.archived += removed
+            return removed
+
+    def archive(self, records):
+        """Append records to today's archive file and fsync before returning."""
+        if not records:
+            return
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"sessions-{datetime.now():%Y-%m-%d}.jsonl.gz")
+        # Each call appends a gzip member; readers see one continuous stream.
+        with open(path, "ab") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                for record in records:
+                    gz.write(json.dumps(record).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_archive(path):
+    """Yield archived session records from one archive file."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+session_index = SessionIndex()
+session_compactor = SessionCompactor()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Username-sharded routing of walker calls across Jac sessions.
+
+With ``GRAPH_SHARDS=N`` the graph is split into N shards. Each shard has its own
+Jac session, graph snapshot and mutation log under ``shards/<n>/``. Learner
+data (the learner node, its mastery and chapter_progress edges, and its
+classroom participants) lives only on the shard that owns the username. The
+topic and chapter catalog and the classrooms are seeded on every shard and
+treated as read-only replicas.
+
+With several shards, each runs at most ``SHARD_CONCURRENCY`` walkers at a time
+(default 1, one owner per session), so N shards keep up to N cores busy
+without two processes writing one session. With one shard (the default)
+commands, paths and concurrency are the same as before sharding: walkers,
+including slow LLM calls, run side by side unless ``SHARD_CONCURRENCY`` is
+set.
+
+Walkers that read and rewrite a learner's data (``evaluate_answer`` updating
+a mastery score from the old one) are run with ``serialize=True``: calls for
+the same username then take turns, so two answers cannot both read the old
+score and lose one update. Usernames share ``USER_LOCK_STRIPES`` locks.
+
+``save_snapshot`` runs with ``exclusive=True``: it waits for the shard's
+running walkers to finish and no other walker starts until it is done. The
+snapshot then holds every write logged before it, so the log segments it
+compacts are covered.
+"""
+import os
+import subprocess
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from json_codec import loads
+from metrics import registry as metrics_registry, subprocess_spawns, walker_seconds
+from profiling import child_env as profile_env
+
+GRAPH_SHARDS = max(int(os.environ.get("GRAPH_SHARDS", "1")), 1)
+SHARD_CONCURRENCY = max(int(os.environ["SHARD_CONCURRENCY"]), 1) if os.environ.get("SHARD_CONCURRENCY") else None
+USER_LOCK_STRIPES = 1024
+SHARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shards")
+
+
+class SharedLock:
+    """Many shared holders or one exclusive one; a waiting exclusive holder goes next."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive or self._waiting:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+def shard_for(username, shards=GRAPH_SHARDS):
+    """Owning shard of a username; stable across processes and restarts."""
+    return zlib.crc32(username.encode("utf-8")) % shards
+
+
+def local_shard():
+    """Shard the current Jac process serves (set by the router)."""
+    return int(os.environ.get("GRAPH_SHARD", "0"))
+
+
+def owns(username):
+    """True if this process's shard holds the learner data for ``username``."""
+    return shard_for(username, int(os.environ.get("GRAPH_SHARDS", "1"))) == local_shard()
+
+
+class ShardRouter:
+    def __init__(self, shards=GRAPH_SHARDS, concurrency=SHARD_CONCURRENCY, directory=SHARD_DIR, command=None):
+        # command(walker, args, shard) builds the argv for one walker call.
+        self.shards = shards
+        self.directory = directory
+        self.command = command or self._jac_command
+        if concurrency is None:
+            concurrency = 1 if shards > 1 else None
+        # No slots at all for an unlimited shard; run() then never waits
+        self._slots = [threading.Semaphore(concurrency) if concurrency else nullcontext() for _ in range(shards)]
+        # Held shared by every walker call, exclusively by snapshots
+        self._sessions = [SharedLock() for _ in range(shards)]
+        # Walker calls waiting for a slot, per shard
+        self.waiting = [0] * shards
+        self._waiting_lock = threading.Lock()
+        self._user_locks = [threading.Lock() for _ in range(USER_LOCK_STRIPES)]
+        self._pool = ThreadPoolExecutor(max_workers=shards, thread_name_prefix="shard")
+
+    def shard_for(self, username):
+        return shard_for(username, self.shards)
+
+    def session_path(self, shard):
+        if self.shards == 1:
+            return None
+        return os.path.join(self.directory, str(shard), "graph.session")
+
+    def snapshot_path(self, shard):
+        if self.shards == 1:
+            return None
+        return os.path.join(self.directory, str(shard), "graph.snap")
+
+    def wal_dir(self, shard):
+        if self.shards == 1:
+            return None
+        return os.path.join(self.directory, str(shard), "wal")
+
+    def env(self, shard):
+        """Environment for a walker process on ``shard``."""
+        env = dict(os.environ, METRICS_CHILD="1")
+        if self.shards > 1:
+            os.makedirs(os.path.join(self.directory, str(shard)), exist_ok=True)
+            env.update(
+                GRAPH_SHARD=str(shard),
+                GRAPH_SHARDS=str(self.shards),
+                GRAPH_SNAPSHOT=self.snapshot_path(shard),
+                WAL_DIR=self.wal_dir(shard),
+            )
+        return env
+
+    def user_lock(self, username):
+        """Lock serializing read-modify-write walkers for ``username``."""
+        return self._user_locks[zlib.crc32(username.encode("utf-8")) % len(self._user_locks)]
+
+    def run(self, walker, args=None, username=None, shard=None, timeout=10, parse=True, raw=False, serialize=False, exclusive=False):
+        """Run a walker on the shard owning ``username`` (shard 0 if none).
+
+        Returns the parsed JSON report (or True when ``parse`` is off), or None
+        if the walker failed. With ``raw`` the report is only validated and its
+        bytes are returned, for handlers that pass it through unchanged. With
+        ``serialize`` it waits for other serialized calls for ``username``, and
+        with ``exclusive`` it runs alone on its shard.
+        """
+        if serialize:
+            # Taken before the shard slot, so a waiting call does not hold one
+            with self.user_lock(username):
+                return self.run(walker, args, username, shard, timeout, parse, raw, exclusive=exclusive)
+        if shard is None:
+            shard = self.shard_for(username) if username is not None else 0
+        cmd = self.command(walker, args or {}, shard)
+        env = self.env(shard)
+        # A profiled request's walkers sample themselves into the same profile directory
+        env.update(profile_env(walker))
+        with self._waiting_lock:
+            self.waiting[shard] += 1
+        session = self._sessions[shard]
+        with session.exclusive() if exclusive else session.shared(), self._slots[shard]:
+            with self._waiting_lock:
+                self.waiting[shard] -= 1
+            subprocess_spawns.inc("walker")
+            with walker_seconds.time(walker):
+                result = subprocess.run(cmd, capture_output=True, timeout=timeout, env=env)
+        # The child's LLM timings and token counts arrive on its stderr
+        metrics_registry.merge_child_output(result.stderr.decode("utf-8", "replace"))
+        if result.returncode == 0:
+            if not parse:
+                return True
+            report = loads(result.stdout)
+            # Empty or null reports come back parsed so callers' fallbacks still apply
+            return result.stdout if raw and report else report
+        return None
+
+    def broadcast(self, walker, args=None, timeout=10, parse=True, exclusive=False):
+        """Run a walker on every shard in parallel; results are in shard order."""
+        futures = [
+            self._pool.submit(self._run_quietly, walker, args, shard, timeout, parse, exclusive)
+            for shard in range(self.shards)
+        ]
+        return [f.result() for f in futures]
+
+    def _run_quietly(self, walker, args, shard, timeout, parse, exclusive):
+        try:
+            return self.run(walker, args, shard=shard, timeout=timeout, parse=parse, exclusive=exclusive)
+        except Exception:
+            return None
+
+    def _jac_command(self, walker, args, shard):
+        cmd = ["jac", "run", "main.jac", "-w", walker]
+        if self.shards > 1:
+            cmd += ["--session", self.session_path(shard)]
+        for key, value in args.items():
+            cmd += ["--args", f"{key}={value}"]
+        return cmd
+
+
+def merge_classrooms(results):
+    """Merge per-shard classroom listings: shard 0's classroom fields, every shard's participants.
+
+    Each shard only counts the students it seated, so ``active_students`` is
+    recounted from the merged participants.
+    """
+    merged = {}
+    for result in results:
+        for entry in result or []:
+            name = entry["classroom"]["name"]
+            if name not in merged:
+                merged[name] = {"classroom": dict(entry["classroom"]), "participants": []}
+            merged[name]["participants"].extend(entry.get("participants", []))
+    for entry in merged.values():
+        entry["classroom"]["active_students"] = sum(p.get("role", "student") == "student" for p in entry["participants"])
+    return list(merged.values())
@@ -0,0 +1,54 @@
+from admission import Admission, request_user, route_class
+
+LIMITS = {
+    "quiz": (1, 2),
+    "walker": (1, 20),
+}
+
+
+def test_routes_are_classed_by_cost():
+    assert route_class("/api/quiz") == "quiz"
+    assert route_class("/api/evaluate") == "quiz"
+    assert route_class("/api/execute") == "execute"
+    assert route_class("/api/progress/ada") == "walker"
+    assert route_class("/api/chapters/Walkers") == "read"
+    assert route_class("/api/recommend/ada") == "read"
+    assert route_class("/api/instructor/topics/Walkers") == "read"
+    assert route_class("/metrics") == "read"
+
+
+def test_user_is_the_client_address_unless_a_header_is_trusted():
+    assert request_user("10.0.0.1") == "10.0.0.1"
+    assert request_user("10.0.0.1", trusted_user="ada") == "ada"
+
+
+def test_empty_user_bucket_is_a_429_with_retry_after():
+    admission = Admission(limits=LIMITS, max_in_flight=100, user_in_flight=100)
+    assert [admission.admit("10.0.0.1", "quiz")[0] for _ in range(3)] == [200, 200, 429]
+    status, retry_after = admission.admit("10.0.0.1", "quiz")
+    assert status == 429 and 0 < retry_after <= 1
+    assert admission.rejected["rate_limited"] == 2
+
+
+def test_one_client_cannot_crowd_out_another():
+    admission = Admission(limits=LIMITS, max_in_flight=8, user_in_flight=4)
+    # Many usernames in the path still come from one address
+    statuses = [admission.admit("10.0.0.1", "walker")[0] for _ in range(40)]
+    assert statuses.count(200) == 4
+    assert admission.admit("10.0.0.2", "walker") == (200, 0)
+    for _ in range(4):
+        admission.release("10.0.0.1", "walker")
+    assert admission.admit("10.0.0.1", "walker") == (200, 0)
+
+
+def test_requests_are_shed_at_the_in_flight_mark():
+    admission = Admission(limits={}, high_water=1, max_in_flight=2)
+    assert admission.admit("ada", "quiz") == (200, 0)
+    assert admission.admit("bob", "quiz")[0] == 503
+    assert admission.admit("bob", "walker") == (200, 0)
+    assert admission.admit("cy", "walker")[0] == 503
+    admission.release("ada", "quiz")
+    admission.release("bob", "walker")
+    assert admission.in_flight == 0
+    assert admission.admit("bob", "quiz") == (200, 0)
+    assert admission.admit("dee", "read") == (200, 0)
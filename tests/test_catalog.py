@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from blob_store import BlobStore
+from catalog import MAX_CHAPTER_PAGE_SIZE, chapter_page, decode_cursor, encode_cursor
+from catalog_source import build, reorder
+
+def write_topic(root, name, chapters):
+    topic_dir = root / name.lower()
+    (topic_dir / "chapters").mkdir(parents=True)
+    (topic_dir / "topic.json").write_text(json.dumps({"name": name, "aliases": [name.upper()]}))
+    for i, (title, order) in enumerate(chapters):
+        (topic_dir / "chapters" / f"{i}.json").write_text(json.dumps({"title": title, "order": order, "content": title}))
+
+
+def test_reorder_edits_the_source_and_the_next_build(tmp_path):
+    source = tmp_path / "topics"
+    write_topic(source, "Walkers", [("Intro", 1), ("Spawning", 2), ("Visiting", 3)])
+    reorder("WALKERS", "Intro", 4, source_dir=str(source))
+    compiled = build(str(source), str(tmp_path / "catalog.json"), str(tmp_path / "cache.json"), BlobStore(str(tmp_path / "blobs")))
+    [topic] = compiled["topics"]
+    assert [ch["title"] for ch in topic["chapters"]] == ["Spawning", "Visiting", "Intro"]
+
+
+def test_reorder_unknown_chapter_raises(tmp_path):
+    write_topic(tmp_path, "Walkers", [("Intro", 1)])
+    with pytest.raises(KeyError):
+        reorder("Walkers", "Missing", 1, source_dir=str(tmp_path))
+    with pytest.raises(KeyError):
+        reorder("Nodes", "Intro", 1, source_dir=str(tmp_path))
+
+
+def numbered(count):
+    return [{"title": f"Chapter {i}", "order": i, "size": 1, "hash": str(i)} for i in range(1, count + 1)]
+
+
+def test_cursor_round_trips():
+    chapter = {"title": "Spawning", "order": 2}
+    assert decode_cursor(encode_cursor(chapter)) == (2, "Spawning")
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", encode_cursor({"title": 3, "order": "x"})])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_every_chapter_once():
+    chapters = numbered(7)
+    seen, cursor = [], None
+    while True:
+        page, cursor = chapter_page(chapters, cursor, limit=3)
+        seen += page
+        if cursor is None:
+            break
+    assert seen == chapters
+
+
+def test_insert_before_the_cursor_does_not_shift_the_next_page():
+    chapters = numbered(6)
+    first, cursor = chapter_page(chapters, limit=3)
+    chapters.insert(0, {"title": "Preface", "order": 0, "size": 1, "hash": "p"})
+    second, _ = chapter_page(chapters, cursor, limit=3)
+    assert [ch["order"] for ch in second] == [4, 5, 6]
+
+
+def test_limit_is_clamped():
+    chapters = numbered(MAX_CHAPTER_PAGE_SIZE + 5)
+    assert len(chapter_page(chapters, limit=10_000)[0]) == MAX_CHAPTER_PAGE_SIZE
+    assert len(chapter_page(chapters, limit=0)[0]) == 1
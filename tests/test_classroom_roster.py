@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from classroom_roster import ClassroomRegistry, replay_seats
+
+
+def listing(capacity=2, participants=()):
+    room = {"name": "Lab", "instructor": "Dr. Chen", "capacity": capacity, "active_students": len(participants)}
+    return [{"classroom": room, "participants": [{"username": name, "role": "student"} for name in participants]}]
+
+
+def test_replayed_joins_and_leaves_reach_a_snapshot_listing():
+    classrooms = replay_seats(listing(participants=["ada", "bob"]), [
+        ("mastery", ("ada", "Walkers", 0.5)),
+        ("leave", ("Lab", "ada")),
+        ("session", ("Lab", "cy", "student")),
+        ("session", ("Gone", "dee", "student")),
+    ])
+    assert [p["username"] for p in classrooms[0]["participants"]] == ["bob", "cy"]
+
+
+def test_full_room_waitlists_and_seats_in_order():
+    gate = ClassroomRegistry(source=lambda: listing(capacity=1))
+    assert gate.admit("Lab", "ada")["status"] == "admitted"
+    assert gate.admit("Lab", "bob") == {"status": "waitlisted", "position": 1, "active_students": 1, "capacity": 1}
+    assert gate.admit("Lab", "cy")["position"] == 2
+    assert gate.leave("Lab", "ada") == {"left": True, "admitted": ["bob"]}
+    assert gate.get("Lab")["active_students"] == 1
+
+
+def test_concurrent_admits_never_exceed_capacity():
+    capacity, students = 30, 5000
+    gate = ClassroomRegistry(source=lambda: listing(capacity=capacity))
+    results = [None] * students
+    start = threading.Barrier(50)
+
+    def join(worker):
+        start.wait()
+        for i in range(worker, students, 50):
+            results[i] = gate.admit("Lab", f"student{i}")
+
+    threads = [threading.Thread(target=join, args=(w,)) for w in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    admitted = [r for r in results if r["status"] == "admitted"]
+    waitlisted = sorted(r["position"] for r in results if r["status"] == "waitlisted")
+    assert len(admitted) == capacity
+    assert gate.get("Lab")["active_students"] == capacity
+    assert waitlisted == list(range(1, students - capacity + 1))
+
+
+def test_failed_load_is_retried():
+    calls = []
+
+    def source():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("shard 1 failed")
+        return listing()
+
+    gate = ClassroomRegistry(source=source)
+    with pytest.raises(RuntimeError):
+        gate.admit("Lab", "ada")
+    assert gate.admit("Lab", "ada")["status"] == "admitted"
+    assert [room["name"] for room in gate.listing()] == ["Lab"]
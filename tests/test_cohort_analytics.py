@@ -0,0 +1,51 @@
+from cohort_analytics import CohortAnalytics
+from mastery_matrix import MasteryMatrix
+from prereq_dag import PrerequisiteIndex
+
+CHAPTERS = ["Intro", "Spawning", "Visiting"]
+
+
+def analytics(mastery_rows=(), progress_rows=(), edges=()):
+    graph = {"topics": [("Nodes", 1), ("Walkers", 2)], "edges": list(edges)}
+    return CohortAnalytics(
+        mastery=MasteryMatrix(source=lambda: list(mastery_rows)),
+        progress=MasteryMatrix(source=lambda: list(progress_rows)),
+        prereqs=PrerequisiteIndex(source=lambda: graph),
+        chapters=lambda topic: CHAPTERS,
+    )
+
+
+def test_chapter_funnel_loads_progress_before_counting_learners():
+    cohort = analytics(progress_rows=[
+        ("ada", "Intro", 1.0), ("ada", "Spawning", 1.0), ("ada", "Visiting", 0.0),
+        ("bob", "Intro", 1.0), ("bob", "Spawning", 0.0),
+    ])
+    funnel = cohort.chapter_funnel("Walkers")
+    assert funnel["learners"] == 2
+    assert funnel["funnel"] == [
+        {"chapter": "Intro", "started": 2, "completed": 2, "completed_through": 2},
+        {"chapter": "Spawning", "started": 2, "completed": 1, "completed_through": 1},
+        {"chapter": "Visiting", "started": 1, "completed": 0, "completed_through": 0},
+    ]
+
+
+def test_topic_distribution_and_stuck_learners():
+    cohort = analytics(
+        mastery_rows=[("ada", "Nodes", 0.9), ("bob", "Nodes", 0.4)],
+        edges=[("Walkers", "Nodes", 0.7)],
+    )
+    distribution = cohort.topic_distribution("Nodes", bins=10)
+    assert distribution["learners"] == 2
+    assert abs(distribution["mean"] - 0.65) < 1e-6
+    assert sum(distribution["histogram"]["counts"]) == 2
+
+    stuck = cohort.stuck_learners("Walkers")["prerequisites"]
+    assert stuck == [{"topic": "Walkers", "prerequisite": "Nodes", "required": 0.7,
+                      "attempted": 2, "stuck": 1, "learners": ["bob"]}]
+
+
+def test_cached_report_is_recomputed_after_a_write():
+    cohort = analytics(mastery_rows=[("ada", "Nodes", 0.2)])
+    assert cohort.topic_distribution("Nodes")["learners"] == 1
+    cohort.mastery.set("bob", "Nodes", 0.8)
+    assert cohort.topic_distribution("Nodes")["learners"] == 2
@@ -0,0 +1,26 @@
+import importlib
+import importlib.util
+import sys
+
+import pytest
+
+import json_codec
+
+PAYLOAD = {"score": float("nan"), "scores": [1.5, float("inf"), (float("-inf"), "ä")]}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "json":
+        # An entry of None makes ``import orjson`` raise ImportError
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    elif importlib.util.find_spec("orjson") is None:
+        pytest.skip("orjson is not installed")
+    yield importlib.reload(json_codec)
+    monkeypatch.undo()
+    importlib.reload(json_codec)
+
+
+def test_non_finite_floats_are_written_as_null(codec):
+    assert codec.dumps(PAYLOAD) == '{"score":null,"scores":[1.5,null,[null,"ä"]]}'.encode("utf-8")
+    assert codec.dumps({"score": 0.5}) == b'{"score":0.5}'
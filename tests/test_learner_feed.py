@@ -0,0 +1,143 @@
+import threading
+
+import learner_feed
+from learner_feed import LearnerFeed
+from mastery_matrix import MasteryMatrix
+from mutation_log import MutationLog
+from prereq_dag import PrerequisiteIndex
+
+
+class Shard:
+    """One shard's graph rows as export_learner_state reports them."""
+
+    def __init__(self, position=(0, 0)):
+        self.position = position
+        self.mastery = []
+        self.progress = []
+
+    def report(self):
+        return {"position": list(self.position), "topics": [["Nodes", 1], ["Walkers", 2]],
+                "edges": [["Walkers", "Nodes", 0.7]], "mastery": list(self.mastery), "progress": list(self.progress)}
+
+
+def feed_for(shards, logs):
+    exports = []
+
+    def export():
+        exports.append(1)
+        return [shard.report() for shard in shards]
+
+    feed = LearnerFeed(export=export, logs=logs, mastery=MasteryMatrix(), progress=MasteryMatrix(),
+                       prereqs=PrerequisiteIndex())
+    return feed, exports
+
+
+def test_refresh_applies_logged_writes_without_reexporting(tmp_path):
+    wal = MutationLog(str(tmp_path))
+    shard = Shard()
+    shard.mastery.append(["ada", "Nodes", 0.5])
+    feed, exports = feed_for([shard], [wal])
+
+    assert feed.refresh() is False
+    feed.load()
+    assert feed.mastery.count("Nodes") == 1
+
+    wal.append("mastery", "bob", "Nodes", 0.9)
+    wal.append("chapter", "bob", "Intro", "2024-01-01")
+    feed.refresh()
+    feed.refresh()
+    wal.close()
+    assert exports == [1]
+    assert feed.mastery.count("Nodes") == 2
+    assert feed.progress.count("Intro") == 1
+
+
+def test_records_from_every_shard_log_are_applied(tmp_path):
+    logs = [MutationLog(str(tmp_path / "0")), MutationLog(str(tmp_path / "1"))]
+    feed, _ = feed_for([Shard(), Shard()], logs)
+    feed.load()
+    logs[0].append("mastery", "ada", "Nodes", 0.4)
+    logs[1].append("mastery", "bob", "Nodes", 0.8)
+    feed.refresh()
+    for wal in logs:
+        wal.close()
+    assert sorted(feed.mastery.learners(range(feed.mastery.learner_count))) == ["ada", "bob"]
+
+
+def test_reload_marker_reexports_and_resumes_after_it(tmp_path):
+    wal = MutationLog(str(tmp_path))
+    shard = Shard()
+    feed, exports = feed_for([shard], [wal])
+    feed.load()
+
+    # A bulk import writes the graph, then logs only a marker
+    shard.mastery.append(["ada", "Nodes", 0.3])
+    wal.append("reload")
+    wal.append("mastery", "bob", "Nodes", 0.9)
+    feed.refresh()
+    # Requests don't export; until the loader does, they get what is loaded
+    assert len(exports) == 1 and feed.mastery.count("Nodes") == 0
+    feed.load()
+    feed.refresh()
+    wal.close()
+    assert len(exports) == 2
+    assert feed.mastery.count("Nodes") == 2
+
+
+def test_compacted_position_reloads_from_the_graph(tmp_path):
+    wal = MutationLog(str(tmp_path))
+    shard = Shard()
+    feed, exports = feed_for([shard], [wal])
+    feed.load()
+
+    wal.append("mastery", "ada", "Nodes", 0.6)
+    shard.mastery.append(["ada", "Nodes", 0.6])
+    shard.position = wal.rotate()
+    wal.compact(shard.position)
+    feed.refresh()
+    feed.load()
+    wal.close()
+    assert len(exports) == 2
+    assert feed.mastery.count("Nodes") == 1
+
+
+def test_logged_mastery_unlocks_downstream_topics(tmp_path):
+    wal = MutationLog(str(tmp_path))
+    shard = Shard()
+    shard.mastery.append(["ada", "Nodes", 0.5])
+    feed, _ = feed_for([shard], [wal])
+    feed.load()
+    assert [t["name"] for t in feed.prereqs.recommend("ada")["locked"]] == ["Walkers"]
+
+    wal.append("mastery", "ada", "Nodes", 0.8)
+    feed.refresh()
+    wal.close()
+    recommendation = feed.prereqs.recommend("ada")
+    assert recommendation["locked"] == []
+    assert [t["name"] for t in recommendation["unlocked"]] == ["Nodes", "Walkers"]
+
+
+def test_loader_backs_off_after_a_failed_export(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(learner_feed.time, "sleep", sleeps.append)
+    wal = MutationLog(str(tmp_path))
+    shard = Shard()
+    shard.mastery.append(["ada", "Nodes", 0.5])
+    attempts = []
+
+    def export():
+        attempts.append(1)
+        if len(attempts) < 3:
+            return [None]
+        return [shard.report()]
+
+    feed = LearnerFeed(export=export, logs=[wal], mastery=MasteryMatrix(), progress=MasteryMatrix(),
+                       prereqs=PrerequisiteIndex())
+    feed.start()
+    for _ in range(200):
+        if feed.refresh():
+            break
+        threading.Event().wait(0.01)
+    wal.close()
+    assert feed.mastery.count("Nodes") == 1
+    assert sleeps == [learner_feed.FEED_RETRY_SECONDS, learner_feed.FEED_RETRY_SECONDS * 2]
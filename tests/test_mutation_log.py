@@ -0,0 +1,46 @@
+import os
+
+from mutation_log import MutationLog
+
+
+def segment(directory):
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+    return os.path.join(directory, names[-1])
+
+
+def test_replay_returns_appended_records(tmp_path):
+    wal = MutationLog(str(tmp_path), group_commit_ms=0)
+    wal.append("mastery", "ada", "Walkers", 0.5)
+    wal.append("chapter", "ada", "Hello World", "2024-01-01")
+    wal.close()
+    assert list(MutationLog(str(tmp_path)).replay()) == [
+        ("mastery", ("ada", "Walkers", 0.5)),
+        ("chapter", ("ada", "Hello World", "2024-01-01")),
+    ]
+
+
+def test_append_after_torn_tail_stays_reachable(tmp_path):
+    wal = MutationLog(str(tmp_path), group_commit_ms=0)
+    wal.append("mastery", "ada", "Walkers", 0.5)
+    wal.close()
+    # A writer that died mid-append leaves a partial record behind
+    with open(segment(str(tmp_path)), "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")
+
+    reopened = MutationLog(str(tmp_path), group_commit_ms=0)
+    reopened.append("mastery", "ada", "Walkers", 0.75)
+    reopened.close()
+    assert list(MutationLog(str(tmp_path)).replay()) == [
+        ("mastery", ("ada", "Walkers", 0.5)),
+        ("mastery", ("ada", "Walkers", 0.75)),
+    ]
+
+
+def test_replay_from_position_skips_covered_records(tmp_path):
+    wal = MutationLog(str(tmp_path), group_commit_ms=0)
+    wal.append("mastery", "ada", "Walkers", 0.5)
+    position = wal.rotate()
+    wal.append("leave", "Room 1", "ada")
+    wal.close()
+    assert list(MutationLog(str(tmp_path)).replay(position)) == [("leave", ("Room 1", "ada"))]
+    assert MutationLog(str(tmp_path)).pending_after(position)
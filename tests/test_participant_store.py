@@ -0,0 +1,62 @@
+from graph_snapshot import Snapshot, SnapshotWriter, classrooms
+from participant_store import SessionRows, drop_expired, expired_records, is_seated, live_participants, seat, unseat
+
+
+class Page:
+    def __init__(self):
+        self.count = 0
+        self.rows = b""
+
+
+def test_rows_round_trip_through_the_page_field():
+    page = Page()
+    seat(page, "ada", "student", "2024-01-15T09:00:00")
+    seat(page, "Dr. Chen", "instructor", "2024-01-15T08:55:00", is_muted=False, camera_on=True, join_time="08:55 AM")
+    assert page.count == 2
+    assert live_participants(page.rows) == [
+        {"username": "ada", "role": "student", "is_muted": True, "camera_on": False, "hand_raised": False},
+        {"username": "Dr. Chen", "role": "instructor", "is_muted": False, "camera_on": True, "hand_raised": False},
+    ]
+
+
+def test_rejoin_reopens_the_same_row():
+    page = Page()
+    seat(page, "ada", "student", "2024-01-15T09:00:00")
+    assert unseat(page, "ada", "2024-01-15T10:00:00") == "student"
+    assert unseat(page, "ada", "2024-01-15T10:05:00") == ""
+    assert not is_seated(page, "ada")
+    seat(page, "ada", "student", "2024-01-15T11:00:00")
+    assert is_seated(page, "ada") and page.count == 1
+
+
+def test_expired_rows_are_archived_then_dropped():
+    page = Page()
+    for name in ("ada", "bob", "cy"):
+        seat(page, name, "student", "2024-01-15T09:00:00", join_time=f"{name} time")
+    unseat(page, "ada", "2024-01-15T10:00:00")
+    unseat(page, "bob", "2024-01-16T10:00:00")
+    assert expired_records(page, "2024-01-16T00:00:00") == [{
+        "username": "ada", "role": "student", "join_time": "ada time",
+        "joined_at": "2024-01-15T09:00:00", "ended_at": "2024-01-15T10:00:00", "participation_score": 0.0,
+    }]
+    assert drop_expired(page, "2024-01-16T00:00:00") == ["ada"]
+    rows = SessionRows(page.rows)
+    assert rows.usernames == ["bob", "cy"] and rows.labels == ["bob time", "cy time"]
+    assert [p["username"] for p in live_participants(page.rows)] == ["cy"]
+
+
+def test_snapshot_listing_reads_session_pages(tmp_path):
+    page = Page()
+    seat(page, "ada", "student", "2024-01-15T09:00:00")
+    seat(page, "bob", "student", "2024-01-15T09:00:00")
+    unseat(page, "bob", "2024-01-15T10:00:00")
+    writer = SnapshotWriter()
+    root = writer.add_node("root", {})
+    room = writer.add_node("virtual_classroom", {"name": "Lab", "capacity": 30})
+    stored = writer.add_node("session_page", {"count": page.count, "rows": page.rows})
+    writer.add_edge("GenericEdge", root, room, {})
+    writer.add_edge("GenericEdge", room, stored, {})
+    path = writer.write(str(tmp_path / "graph.snap"))
+    with Snapshot(path) as snapshot:
+        [entry] = classrooms(snapshot)
+    assert [p["username"] for p in entry["participants"]] == ["ada"]
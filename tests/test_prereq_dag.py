@@ -0,0 +1,18 @@
+from prereq_dag import PrerequisiteIndex
+
+GRAPH = {"topics": [["Nodes", 1], ["Walkers", 2]], "edges": [["Walkers", "Nodes", 0.7]]}
+SCORES = {"ada": {"Nodes": 0.8}, "bob": {"Nodes": 0.2}, "cy": {"Nodes": 0.9}}
+
+
+def test_learner_state_is_bounded_and_skips_unknown_learners():
+    index = PrerequisiteIndex(source=lambda: GRAPH, load=lambda username: SCORES.get(username, {}), max_learners=2)
+    for username in ("ghost", "ada", "bob"):
+        index.recommend(username)
+    assert list(index._learners) == ["ada", "bob"]
+
+    index.recommend("ada")
+    index.recommend("cy")
+    assert list(index._learners) == ["ada", "cy"]
+    # An evicted learner is loaded again on the next lookup
+    assert [t["name"] for t in index.recommend("bob")["locked"]] == ["Walkers"]
+    assert index.recommend("ghost")["locked"][0]["missing_prereqs"][0]["current"] == 0.0
@@ -0,0 +1,21 @@
+import pytest
+
+from profiling import MAX_PROFILE_REQUESTS, Profiler
+
+
+def test_admin_calls_need_the_configured_token(tmp_path):
+    assert not Profiler(str(tmp_path), token="").authorized("")
+    profiler = Profiler(str(tmp_path), token="secret")
+    assert profiler.authorized("secret")
+    assert not profiler.authorized("guess")
+    assert not profiler.authorized(None)
+
+
+def test_arm_caps_requests_per_rule(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    assert profiler.arm(MAX_PROFILE_REQUESTS, "/api/quiz", 10) == [
+        {"route": "/api/quiz", "percent": 10, "remaining": MAX_PROFILE_REQUESTS}]
+    for requests, percent in ((0, 100), (MAX_PROFILE_REQUESTS + 1, 100), (5, 0)):
+        with pytest.raises(ValueError):
+            profiler.arm(requests, None, percent)
+    assert len(profiler.rules()) == 1
@@ -0,0 +1,41 @@
+from session_compactor import SessionCompactor, SessionIndex, read_archive
+
+
+def test_index_loads_only_the_classrooms_it_is_asked_about():
+    loaded = []
+    rooms = {"Lab": [("ada", "p-ada")], "Workshop": [("bob", "p-bob")]}
+
+    def source(classroom_name):
+        loaded.append(classroom_name)
+        return rooms.get(classroom_name, [])
+
+    index = SessionIndex(source=source)
+    assert index.get("ada", "Lab") == "p-ada"
+    assert index.get("bob", "Lab") is None
+    index.put("cy", "Lab", "p-cy")
+    assert index.get("cy", "Lab") == "p-cy"
+    index.discard("bob", "Workshop")
+    assert loaded == ["Lab"]
+
+
+def test_discard_keeps_an_entry_replaced_since():
+    index = SessionIndex(source=lambda classroom_name: [("ada", "old")])
+    index.put("ada", "Lab", "new")
+    index.discard("ada", "Lab", "old")
+    assert index.get("ada", "Lab") == "new"
+    index.discard("ada", "Lab")
+    assert index.get("ada", "Lab") is None
+
+
+def test_compact_archives_what_the_sweep_hands_over(tmp_path):
+    records = [{"classroom": "Lab", "username": "ada", "ended_at": "2024-01-01T10:00:00"}]
+
+    def sweep(cutoff, archive):
+        archive(records)
+        return len(records)
+
+    compactor = SessionCompactor(sweep=sweep, archive_dir=str(tmp_path))
+    assert compactor.compact("2024-01-02T00:00:00") == 1
+    assert compactor.archived == 1
+    [path] = tmp_path.iterdir()
+    assert list(read_archive(str(path))) == records
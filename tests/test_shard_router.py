@@ -0,0 +1,68 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shard_router import ShardRouter, merge_classrooms
+
+
+def sleeper(seconds):
+    def command(walker, args, shard):
+        return [sys.executable, "-c", f"import time; time.sleep({seconds}); print('{{}}')"]
+    return command
+
+
+def elapsed_for(router, calls):
+    started = time.monotonic()
+    with ThreadPoolExecutor(calls) as pool:
+        list(pool.map(lambda _: router.run("hello"), range(calls)))
+    return time.monotonic() - started
+
+
+def test_single_shard_runs_walkers_concurrently(tmp_path):
+    router = ShardRouter(shards=1, concurrency=None, directory=str(tmp_path), command=sleeper(0.5))
+    assert elapsed_for(router, 4) < 1.5
+
+
+def test_explicit_concurrency_limits_a_shard(tmp_path):
+    router = ShardRouter(shards=1, concurrency=1, directory=str(tmp_path), command=sleeper(0.2))
+    assert elapsed_for(router, 3) >= 0.6
+
+
+def test_merged_classrooms_count_students_on_every_shard():
+    room = {"name": "Lab", "capacity": 30, "active_students": 1}
+    shards = [
+        [{"classroom": room, "participants": [{"username": "ada", "role": "student"},
+                                              {"username": "Dr. Chen", "role": "instructor"}]}],
+        [{"classroom": dict(room, active_students=2), "participants": [{"username": "bob", "role": "student"},
+                                                                       {"username": "cy", "role": "student"}]}],
+    ]
+    [merged] = merge_classrooms(shards)
+    assert merged["classroom"]["active_students"] == 3
+    assert [p["username"] for p in merged["participants"]] == ["ada", "Dr. Chen", "bob", "cy"]
+    assert room["active_students"] == 1
+
+
+def test_serialized_calls_for_one_user_take_turns(tmp_path):
+    router = ShardRouter(shards=1, concurrency=None, directory=str(tmp_path), command=sleeper(0.3))
+    started = time.monotonic()
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(lambda _: router.run("evaluate_answer", username="ada", serialize=True), range(2)))
+        assert time.monotonic() - started >= 0.6
+        started = time.monotonic()
+        list(pool.map(lambda name: router.run("evaluate_answer", username=name, serialize=True), ["ada", "bob"]))
+    assert router.user_lock("ada") is not router.user_lock("bob")
+    assert time.monotonic() - started < 0.55
+
+
+def test_exclusive_call_runs_alone_on_its_shard(tmp_path):
+    router = ShardRouter(shards=1, concurrency=None, directory=str(tmp_path), command=sleeper(0.3))
+    started = time.monotonic()
+    with ThreadPoolExecutor(3) as pool:
+        walkers = [pool.submit(router.run, "hello") for _ in range(2)]
+        time.sleep(0.05)
+        snapshot = pool.submit(router.run, "save_snapshot", exclusive=True)
+        time.sleep(0.05)
+        late = pool.submit(router.run, "hello")
+        [f.result() for f in walkers + [snapshot, late]]
+    # Two walkers side by side, then the snapshot alone, then the late walker
+    assert time.monotonic() - started >= 0.9